@@ -1,15 +1,40 @@
-import eventlet
+import os
+from dotenv import load_dotenv
 
-eventlet.monkey_patch()
+load_dotenv()
 
-from flask import Flask, request, jsonify
-from flask_socketio import SocketIO, emit, join_room
-from dotenv import load_dotenv
-import os, requests, time, traceback, mimetypes
+# "eventlet" (default) runs this module with socketio.run; "asgi" runs the
+# asyncio server in asgi_server.py, which imports this module for its routes
+SERVER_MODE = os.getenv("SERVER_MODE", "eventlet")
+
+if SERVER_MODE == "eventlet":
+    import eventlet
+
+    eventlet.monkey_patch()
+
+from flask import Flask, Response, request, jsonify, send_file
+from flask_socketio import SocketIO, emit, join_room, rooms, ConnectionRefusedError
+import re, sys, requests, time, traceback, mimetypes, base64, json, hashlib, hmac, secrets, itertools
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlencode
 from flask_cors import CORS
 from supabase import create_client
-
-load_dotenv()
+from vapi_client import VapiClient
+from token_verifier import TokenVerifier
+from ttl_cache import TTLCache
+from webhook_journal import WebhookJournal
+from call_store import create_call_store
+from file_index import FileHashIndex
+from transcription_relay import TranscriptRelay
+from audio_fanout import AudioFanout
+from transcript_analytics import analyze_calls, aggregate_by_student
+from search_index import TranscriptSearchIndex
+from batch_calls import BatchCallLauncher, CallBatch
+from control_channel import ControlPipeline
+from recording_cache import RecordingCache
+from call_lifecycle import CallLifecycle
+from socket_encoding import TeacherEvents, client_options, create_variant_members, encode, snapshot_delta, variant_room
+import telemetry, compression, call_export
 
 app = Flask(__name__)
 CORS(
@@ -20,34 +45,112 @@ CORS(
     supports_credentials=True
 )
 
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='eventlet')
+# With REDIS_URL set, emits and the active-call registry are shared across workers
+REDIS_URL = os.getenv("REDIS_URL")
+# In asgi mode this server never accepts connections; asgi_server.py forwards its emits
+socketio = SocketIO(
+    app,
+    cors_allowed_origins="*",
+    async_mode='eventlet' if SERVER_MODE == "eventlet" else 'threading',
+    message_queue=REDIS_URL,
+)
+# new_call / call_ended / call_report go out in each teacher's chosen encoding,
+# only to the variant rooms some socket joined
+variant_members = create_variant_members(REDIS_URL)
+teacher_events = TeacherEvents(socketio.emit, members=variant_members)
+# sid -> variant room of this process's teacher sockets, to leave on disconnect
+socket_variants: dict[str, str] = {}
+
+COMPRESSION = {
+    "min_size": int(os.getenv("COMPRESS_MIN_BYTES", "1024")),
+    "gzip_level": int(os.getenv("GZIP_LEVEL", "6")),
+    "brotli_quality": int(os.getenv("BROTLI_QUALITY", "5")),
+}
+compression.init_app(app, **COMPRESSION)
 
 VAPI_KEY = os.getenv("VAPI_API_KEY")
-API_URL = "https://api.vapi.ai"
+API_URL = os.getenv("VAPI_API_URL", "https://api.vapi.ai")
 PHONE_ID = os.getenv("VAPI_PHONE_NUMBER_ID")
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
 
 supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+vapi = VapiClient(
+    API_URL,
+    VAPI_KEY,
+    max_retries=int(os.getenv("VAPI_MAX_RETRIES", "3")),
+    on_request=telemetry.observe_vapi,
+)
+
+def remote_user_id(token: str) -> str | None:
+    response = supabase.auth.get_user(token)
+    return response.user.id if response and response.user else None
+
+token_verifier = TokenVerifier(
+    jwt_secret=os.getenv("SUPABASE_JWT_SECRET"),
+    jwks_url=os.getenv("SUPABASE_JWKS_URL"),
+    remote_verify=remote_user_id,
+    fallback=os.getenv("AUTH_REMOTE_FALLBACK", "true").lower() != "false",
+    max_entries=int(os.getenv("AUTH_CACHE_SIZE", "2048")),
+)
 
 def current_teacher(request) -> str:
+    """Verify the request's bearer token."""
     try:
         auth_header = request.headers.get("Authorization", "")
         token = auth_header.replace("Bearer ", "").strip()
         if not token:
             raise PermissionError("Missing bearer token")
-        
-        response = supabase.auth.get_user(token)
-        if not response.user:
-            raise PermissionError("Invalid token")
-        return response.user.id
+
+        with telemetry.stage("auth"):
+            return token_verifier.verify(token)
     except Exception as e:
         app.logger.warning(f"Auth failed: {e}")
         raise PermissionError("Authentication failed")
 
+# Signed links stand in for the bearer token where the browser can't send one
+# (<audio> sources, download links): scoped to one resource and teacher, short-lived
+SIGNED_LINK_TTL = int(os.getenv("SIGNED_LINK_TTL_SEC", "300"))
+_link_secret = os.getenv("LINK_SIGNING_SECRET") or os.getenv("SUPABASE_JWT_SECRET")
+if not _link_secret:
+    app.logger.warning("No LINK_SIGNING_SECRET or SUPABASE_JWT_SECRET; signed links only work on this process")
+    _link_secret = secrets.token_hex(32)
+LINK_SIGNING_KEY = hmac.new(_link_secret.encode(), b"teachai signed links", hashlib.sha256).digest()
+
+def link_signature(scope: str, teacher_id: str, expires: int) -> str:
+    return hmac.new(LINK_SIGNING_KEY, f"{scope}\n{teacher_id}\n{expires}".encode(), hashlib.sha256).hexdigest()
+
+def signed_link(path: str, scope: str, teacher_id: str) -> dict:
+    """{url, expiresAt} for `path`, valid for SIGNED_LINK_TTL seconds."""
+    expires = int(time.time()) + SIGNED_LINK_TTL
+    query = urlencode({"teacher": teacher_id, "expires": expires, "sig": link_signature(scope, teacher_id, expires)})
+    return {"url": f"{path}?{query}", "expiresAt": expires}
+
+def link_teacher(request, scope: str) -> str:
+    """Teacher a request acts for: the bearer token if there is one, else a
+    signed link for `scope` (its teacher / expires / sig query params)."""
+    if request.headers.get("Authorization"):
+        return current_teacher(request)
+    teacher_id = request.args.get("teacher", "")
+    try:
+        expires = int(request.args.get("expires", ""))
+    except ValueError:
+        raise PermissionError("Missing bearer token or signed link")
+    signature = request.args.get("sig", "")
+    if expires < time.time() or not hmac.compare_digest(signature, link_signature(scope, teacher_id, expires)):
+        app.logger.warning(f"Rejected signed link for {scope}")
+        raise PermissionError("Link expired or invalid")
+    return teacher_id
+
 def db_exec(query, *, context: str = ""):
     """Execute Supabase‑py v2 call, raise on error, return payload."""
-    res = query.execute()
+    started = time.perf_counter()
+    try:
+        res = query.execute()
+    except Exception:
+        telemetry.observe_db(context, time.perf_counter() - started, ok=False)
+        raise
+    telemetry.observe_db(context, time.perf_counter() - started, ok=True)
     api_error = getattr(res, "error", None)
     if api_error is None and isinstance(res, dict):
         api_error = res.get("error")
@@ -57,52 +160,285 @@ def db_exec(query, *, context: str = ""):
     return res.data if hasattr(res, "data") else res.get("data", res)
 
 def create_assistant(cfg: dict) -> str:
-    r = requests.post(f"{API_URL}/assistant", headers={"Authorization": VAPI_KEY, "Content-Type": "application/json"}, json=cfg, timeout=15)
-    r.raise_for_status()
-    return r.json()["id"]
+    return vapi.create_assistant(cfg)["id"]
 
 
 def start_call(assistant_id: str, student_name: str, student_number: str) -> str:
-    r = requests.post(
-        f"{API_URL}/call",
-        headers={"Authorization": VAPI_KEY, "Content-Type": "application/json"},
-        json={"phoneNumberId": PHONE_ID, "assistantId": assistant_id, "customer": {"name": student_name, "number": student_number}},
-        timeout=15,
-    )
-    r.raise_for_status()
-    return r.json()["id"]
+    return vapi.create_call({
+        "phoneNumberId": PHONE_ID,
+        "assistantId": assistant_id,
+        "customer": {"name": student_name, "number": student_number},
+    })["id"]
 
 
-def upload_file_to_vapi(file_storage) -> dict:
+def upload_file_to_vapi(file_storage, size: int | None = None) -> dict:
     filename = file_storage.filename
     content_type = file_storage.mimetype or mimetypes.guess_type(filename)[0] or "application/octet-stream"
-    files = {"file": (filename, file_storage.stream, content_type)}
-    r = requests.post(f"{API_URL}/file", headers={"Authorization": f"Bearer {VAPI_KEY}"}, files=files, timeout=60)
-    r.raise_for_status()
-    return r.json()
+    return vapi.upload_file(filename, file_storage.stream, content_type, size=size)
 
+def hash_upload(file_storage, *, chunk_size: int = 1 << 20) -> tuple[str, int]:
+    """SHA-256 and size of an uploaded file, read in chunks; rewinds the stream."""
+    digest, size = hashlib.sha256(), 0
+    for chunk in iter(lambda: file_storage.stream.read(chunk_size), b""):
+        digest.update(chunk)
+        size += len(chunk)
+    file_storage.stream.seek(0)
+    return digest.hexdigest(), size
 
-def poll_listen_url(call_id: str, *, retries: int = 30, delay: int = 2) -> str:
-    for _ in range(retries):
-        r = requests.get(f"{API_URL}/call/{call_id}", headers={"Authorization": VAPI_KEY}, timeout=10)
-        r.raise_for_status()
-        url = r.json().get("monitor", {}).get("listenUrl")
-        if url:
-            return url
-        time.sleep(delay)
-    raise RuntimeError("listenUrl not ready in time")
-
-def poll_control_url(call_id: str, *, retries: int = 30, delay: int = 2) -> str:
+
+def poll_monitor_urls(call_id: str, *, retries: int = 12, delay: float = 0.5, max_delay: float = 8.0) -> tuple[str, str]:
+    """Poll GET /call/{id} until both monitor URLs are present, backing off between attempts."""
     for _ in range(retries):
-        r = requests.get(f"{API_URL}/call/{call_id}", headers={"Authorization": VAPI_KEY}, timeout=10)
-        r.raise_for_status()
-        url = r.json().get("monitor", {}).get("controlUrl")
-        if url:
-            return url
-        time.sleep(delay)
-    raise RuntimeError("controlUrl not ready in time")
+        monitor = vapi.get_call(call_id).get("monitor", {})
+        listen_url = monitor.get("listenUrl")
+        control_url = monitor.get("controlUrl")
+        if listen_url and control_url:
+            return listen_url, control_url
+        socketio.sleep(delay)
+        delay = min(delay * 2, max_delay)
+    raise RuntimeError("monitor URLs not ready in time")
+
+def watch_call_monitor(call_id: str):
+    """Background task: resolve a call's monitor URLs and push them to teachers."""
+    try:
+        listen_url, control_url = poll_monitor_urls(call_id)
+    except Exception as exc:
+        app.logger.warning(f"Monitor URLs unavailable for call {call_id}: {exc}")
+        return
+    publish_monitor_urls(call_id, listen_url, control_url)
+
+def publish_monitor_urls(call_id: str, listen_url: str, control_url: str):
+    info = active_calls.update(call_id, listenUrl=listen_url, controlUrl=control_url)
+    if info is None:
+        return
+    socketio.emit("call_monitor_ready", {
+        "callId": call_id,
+        "listenUrl": listen_url,
+        "controlUrl": control_url,
+    }, namespace="/teacher", to=teacher_room(info["teacherId"]))
+
+    if transcript_relay:
+        transcript_relay.start(call_id, teacher_room(info["teacherId"]))
+        audio_fanout.add_sink(call_id, listen_url, "transcription", lambda frame: transcript_relay.feed(call_id, frame))
+
+active_calls = create_call_store(REDIS_URL)
+
+telemetry.init_app(
+    app,
+    active_calls=active_calls,
+    slow_ms=float(os.getenv("SLOW_REQUEST_MS")) if os.getenv("SLOW_REQUEST_MS") else None,
+    token=os.getenv("METRICS_TOKEN"),
+    # Without a token /metrics is only served when explicitly opened up, which
+    # defaults to on for the debug server and off in production.
+    public=os.getenv("METRICS_PUBLIC", os.getenv("FLASK_DEBUG", "1")).lower() not in ("0", "false", "no"),
+)
+
+def teacher_room(teacher_id: str) -> str:
+    return f"teacher:{teacher_id}"
+
+# Live transcription is only relayed when a streaming STT websocket is configured
+STT_WS_URL = os.getenv("STT_WS_URL")
+transcript_relay = TranscriptRelay(
+    lambda event, data, room: socketio.emit(event, data, namespace="/teacher", to=room),
+    socketio.start_background_task,
+    socketio.sleep,
+    stt_url=STT_WS_URL,
+    stt_headers=[f"Authorization: {os.getenv('STT_AUTH')}"] if os.getenv("STT_AUTH") else None,
+    flush_interval=float(os.getenv("TRANSCRIPT_FLUSH_MS", "250")) / 1000,
+    max_frames=int(os.getenv("TRANSCRIPT_MAX_FRAMES", "200")),
+    logger=app.logger,
+) if STT_WS_URL else None
+
+# One listenUrl connection per call, shared by listening teachers and the transcript relay
+audio_fanout = AudioFanout(
+    lambda sid, call_id, data: socketio.emit("listen_audio", {"callId": call_id, "audio": data}, namespace="/teacher", to=sid),
+    socketio.start_background_task,
+    socketio.sleep,
+    source_rate=int(os.getenv("LISTEN_SOURCE_RATE", "16000")),
+    target_rate=int(os.getenv("LISTEN_SAMPLE_RATE", "0")) or None,
+    mono=os.getenv("LISTEN_MONO", "true").lower() != "false",
+    logger=app.logger,
+)
+
+# call id -> active entry of a recently ended call; its end-of-call report usually lands after the pop
+recently_ended_calls = TTLCache(max_entries=10000, ttl=int(os.getenv("ENDED_CALL_RETENTION_SEC", "3600")))
+
+def call_teacher_query(call_id: str, client=None):
+    return (
+        (client or supabase).table("calls")
+        .select("assistant:assistant_id(teacher_id)")
+        .eq("id", call_id)
+        .limit(1)
+    )
 
-active_calls: dict[str, dict] = {}
+def known_call_teacher(call_id: str, info: dict | None = None) -> str | None:
+    """Owning teacher of a call from the active or recently ended entry, without a DB lookup."""
+    if info and info.get("teacherId"):
+        return info["teacherId"]
+    ended = recently_ended_calls.get(call_id)
+    return ended.get("teacherId") if ended else None
+
+def teacher_for_call(call_id: str, info: dict | None = None) -> str | None:
+    """Owning teacher of a call, from the active or recently ended entry, else the calls table."""
+    teacher_id = known_call_teacher(call_id, info)
+    if teacher_id:
+        return teacher_id
+    rows = db_exec(call_teacher_query(call_id), context="lookup teacher for call")
+    return (rows[0].get("assistant") or {}).get("teacher_id") if rows else None
+
+# teacher_id -> [assistant row ids]; invalidated when a teacher creates or deletes an assistant
+teacher_assistant_ids = TTLCache(max_entries=4096, ttl=int(os.getenv("ASSISTANT_INDEX_TTL", "600")))
+
+def assistant_ids_for(teacher_id: str) -> list[str]:
+    return teacher_assistant_ids.get_or_load(teacher_id, lambda: [
+        a["id"] for a in db_exec(
+            supabase.table("assistants")
+            .select("id")
+            .eq("teacher_id", teacher_id),
+            context="get assistant ids for teacher"
+        )
+    ])
+
+CALL_LIGHT_FIELDS = ["id", "student_name", "recording_url", "duration_sec", "started_at", "viewed"]
+CALL_HEAVY_FIELDS = ["summary", "transcript"]
+# Inner join lets calls be filtered on assistants.teacher_id in the same query
+CALL_ASSISTANT_EMBED = "assistant:assistant_id!inner(assistant_name, teacher_id)"
+CALLS_PAGE_DEFAULT = 50
+CALLS_PAGE_MAX = 200
+
+def encode_cursor(row: dict) -> str:
+    raw = json.dumps([row["started_at"], row["id"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+CURSOR_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+def decode_cursor(cursor: str) -> tuple[str | None, str]:
+    """(started_at, id) of the last row of the previous page. Both go into a
+    PostgREST filter, so started_at must parse as a timestamp (or be null)
+    and the id may only hold id characters."""
+    try:
+        started_at, call_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if started_at is not None:
+            datetime.fromisoformat(started_at)
+        if not isinstance(call_id, str) or not CURSOR_ID_RE.match(call_id):
+            raise ValueError(call_id)
+        return started_at, call_id
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def call_fields(fields_param: str | None) -> list[str]:
+    """Validated calls columns for a `fields` parameter. Heavy columns are only included on request."""
+    if not fields_param:
+        return list(CALL_LIGHT_FIELDS)
+    allowed = set(CALL_LIGHT_FIELDS) | set(CALL_HEAVY_FIELDS) | {"assistant"}
+    requested = [f.strip() for f in fields_param.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    # id and started_at build the next cursor; the assistant embed carries the teacher filter
+    return ["id", "started_at"] + [f for f in requested if f not in ("id", "started_at", "assistant")]
+
+def call_projection(fields_param: str | None) -> str:
+    """Build the calls select list for `call_fields`, plus the assistant embed."""
+    return ", ".join(call_fields(fields_param) + [CALL_ASSISTANT_EMBED])
+
+def archived_param(value: str | None) -> bool | None:
+    """`?archived=true|false|all` → filter value. Archived calls are hidden
+    unless asked for, so absent means false; "all" lists both. The column
+    comes from migrations/001_calls_archived_at.sql."""
+    if value is None or value == "":
+        return False
+    if value.lower() == "all":
+        return None
+    if value.lower() not in ("true", "false", "1", "0"):
+        raise ValueError("archived must be true, false or all")
+    return value.lower() in ("true", "1")
+
+def teacher_calls_query(teacher_id: str, projection: str, *, cursor: tuple[str, str] | None = None,
+                        limit: int = CALLS_PAGE_DEFAULT, client=None, since: str | None = None,
+                        until: str | None = None, assistant_id: str | None = None, archived: bool | None = None):
+    """Keyset page query for a teacher's calls, newest first. `projection` must
+    include the assistant embed (it carries the teacher filter). `client`
+    defaults to the sync Supabase client; `since` / `until` bound started_at
+    (inclusive / exclusive) and `archived` keeps only archived or unarchived calls."""
+    query = (
+        (client or supabase).table("calls")
+        .select(projection)
+        .eq("assistant.teacher_id", teacher_id)
+    )
+    if since:
+        query = query.gte("started_at", since)
+    if until:
+        query = query.lt("started_at", until)
+    if assistant_id:
+        query = query.eq("assistant_id", assistant_id)
+    if archived is not None:
+        query = query.not_.is_("archived_at", "null") if archived else query.is_("archived_at", "null")
+    if cursor:
+        # Calls without started_at sort last, so a page boundary may fall among them
+        started_at, last_id = cursor
+        if started_at is None:
+            query = query.is_("started_at", "null").lt("id", last_id)
+        else:
+            query = query.or_(
+                f'started_at.lt."{started_at}",and(started_at.eq."{started_at}",id.lt."{last_id}"),started_at.is.null'
+            )
+    return query.order("started_at", desc=True, nullsfirst=False).order("id", desc=True).limit(limit)
+
+def teacher_calls_page(teacher_id: str, projection: str, *, cursor: tuple[str, str] | None = None,
+                       limit: int = CALLS_PAGE_DEFAULT, context: str = "get teacher calls", **filters) -> list[dict]:
+    return db_exec(teacher_calls_query(teacher_id, projection, cursor=cursor, limit=limit, **filters), context=context)
+
+def iter_teacher_calls(teacher_id: str, projection: str, *, page_size: int = 500,
+                       context: str = "iterate teacher calls", **filters):
+    """Yield every call of a teacher page by page, never holding more than one
+    page. `filters` are teacher_calls_query's since / until / assistant_id / archived."""
+    cursor = None
+    while True:
+        rows = teacher_calls_page(teacher_id, projection, cursor=cursor, limit=page_size, context=context, **filters)
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        cursor = (rows[-1]["started_at"], rows[-1]["id"])
+
+def conditional_json(payload, last_modified: float | None = None):
+    """jsonify with a content ETag (and optional Last-Modified); answers a
+    matching If-None-Match / If-Modified-Since with 304."""
+    with telemetry.stage("serialize"):
+        response = jsonify(payload)
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.add_etag()
+    if last_modified is not None:
+        response.last_modified = datetime.fromtimestamp(int(last_modified), timezone.utc)
+    response.make_conditional(request)
+    response.headers.add("Access-Control-Allow-Origin", "*")
+    return response
+
+def flush_call_reports(rows: list[dict]):
+    """Write journaled report fields onto existing calls rows. Updates, not an
+    upsert: a report for an unknown, forged or deleted call id must not insert
+    an orphan row, and a partial upsert trips NOT NULL columns anyway."""
+    for row in rows:
+        updated = db_exec(
+            supabase.table("calls")
+            .update({k: v for k, v in row.items() if k != "id"})
+            .eq("id", row["id"]),
+            context="update end-of-call report"
+        )
+        if not updated:
+            app.logger.warning(f"Dropping end-of-call report for unknown call {row['id']}")
+
+webhook_journal = WebhookJournal(
+    os.getenv("WEBHOOK_JOURNAL_PATH", "webhook_journal.db"),
+    flush_call_reports,
+    batch_size=int(os.getenv("WEBHOOK_BATCH_SIZE", "100")),
+    logger=app.logger,
+)
+webhook_journal.start(socketio.start_background_task, socketio.sleep)
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "25")) * 1024 * 1024
+file_index = FileHashIndex(os.getenv("FILE_INDEX_PATH", "file_index.db"))
 
 @app.route("/upload-file", methods=["POST", "OPTIONS"])
 def upload_file():
@@ -117,6 +453,9 @@ def upload_file():
         return response
 
     try:
+        # Refuse oversized bodies before Werkzeug spools them to disk
+        if request.content_length and request.content_length > MAX_UPLOAD_BYTES:
+            return jsonify({"error": f"File exceeds {MAX_UPLOAD_BYTES // (1024 * 1024)} MB limit"}), 413
         if "file" not in request.files:
             return jsonify({"error": "No file field"}), 400
         f = request.files["file"]
@@ -127,11 +466,18 @@ def upload_file():
         name = request.form.get("name", f.filename)
         description = request.form.get("description", "")
 
-        # Upload to Vapi using existing helper
-        vapi_resp = upload_file_to_vapi(f)
-        file_id = vapi_resp.get("id") or vapi_resp.get("fileId")
+        sha256, size = hash_upload(f)
+        if size > MAX_UPLOAD_BYTES:
+            return jsonify({"error": f"File exceeds {MAX_UPLOAD_BYTES // (1024 * 1024)} MB limit"}), 413
+
+        # Identical content was uploaded before: reuse its Vapi file
+        file_id = file_index.get(sha256)
         if not file_id:
-            return jsonify({"error": "Unexpected Vapi response"}), 502
+            vapi_resp = upload_file_to_vapi(f, size=size)
+            file_id = vapi_resp.get("id") or vapi_resp.get("fileId")
+            if not file_id:
+                return jsonify({"error": "Unexpected Vapi response"}), 502
+            file_index.put(sha256, file_id, f.filename, size)
 
         return jsonify({
             "provider": "google",
@@ -144,6 +490,40 @@ def upload_file():
         app.logger.exception("File upload error")
         return jsonify({"error": str(exc)}), 500
     
+ASSISTANT_LISTING_TTL = int(os.getenv("ASSISTANT_LISTING_TTL", "300"))
+teacher_assistant_listings = TTLCache(max_entries=4096, ttl=ASSISTANT_LISTING_TTL)
+student_key_teachers = TTLCache(max_entries=16384, ttl=ASSISTANT_LISTING_TTL)
+
+def teacher_for_student_key(student_key: str) -> str:
+    teacher_row = (
+        supabase.table("teachers")
+        .select("id")
+        .eq("student_key", student_key)
+        .maybe_single()
+        .execute()
+    )
+    if not teacher_row or not teacher_row.data:
+        raise LookupError("Unknown student key")
+    return teacher_row.data["id"]
+
+def cached_teacher_assistants(teacher_id: str) -> dict:
+    """The teacher's assistants (newest first) plus when they were loaded,
+    read through `teacher_assistant_listings`."""
+    def load():
+        assistants = db_exec(
+            supabase.table("assistants")
+            .select("id, vapi_id, assistant_name, system_prompt, first_message, description")
+            .eq("teacher_id", teacher_id)
+            .order("created_at", desc=True),
+            context="teacher assistants"
+        )
+        return {"assistants": assistants, "modified": time.time()}
+    return teacher_assistant_listings.get_or_load(teacher_id, load)
+
+def invalidate_teacher_assistants(teacher_id: str):
+    teacher_assistant_ids.invalidate(teacher_id)
+    teacher_assistant_listings.invalidate(teacher_id)
+
 @app.route("/delete-assistant/<assistant_id>", methods=["DELETE", "OPTIONS"])
 def delete_assistant_endpoint(assistant_id):
     """Delete an assistant by ID. Only the teacher who created it can delete it."""
@@ -169,12 +549,7 @@ def delete_assistant_endpoint(assistant_id):
         vapi_id = assistant_row["vapi_id"]
         
         try:
-            r = requests.delete(
-                f"{API_URL}/assistant/{vapi_id}",
-                headers={"Authorization": f"Bearer {VAPI_KEY}"},
-                timeout=15
-            )
-            r.raise_for_status()
+            vapi.delete_assistant(vapi_id)
         except requests.exceptions.RequestException as vapi_error:
             app.logger.warning(f"Failed to delete assistant from Vapi: {vapi_error}")
         
@@ -186,6 +561,7 @@ def delete_assistant_endpoint(assistant_id):
             .eq("teacher_id", teacher_id),
             context="delete assistant"
         )
+        invalidate_teacher_assistants(teacher_id)
         
         response = jsonify({"success": True, "message": "Assistant deleted successfully"})
         response.headers.add("Access-Control-Allow-Origin", "*")
@@ -240,6 +616,7 @@ def create_assistant_endpoint():
             }),
             context="insert assistant"
         )
+        invalidate_teacher_assistants(teacher_id)
 
         response = jsonify({"success": True, "assistantId": vapi_id})
         response.headers.add("Access-Control-Allow-Origin", "*")
@@ -261,26 +638,13 @@ def assistants_for_student(student_key):
         return response
 
     try:
-        teacher_row = (
-            supabase.table("teachers")
-            .select("id")
-            .eq("student_key", student_key)
-            .maybe_single()
-            .execute()
-        )
-        teacher_id = teacher_row.data["id"]
-
-        assistants = db_exec(
-            supabase.table("assistants")
-            .select("id, vapi_id, assistant_name")
-            .eq("teacher_id", teacher_id)
-            .order("created_at", desc=True),
-            context="assistants by student key"
-        )
-
-        response = jsonify(assistants)
-        response.headers.add("Access-Control-Allow-Origin", "*")
-        return response, 200
+        teacher_id = student_key_teachers.get_or_load(student_key, lambda: teacher_for_student_key(student_key))
+        listing = cached_teacher_assistants(teacher_id)
+        assistants = [
+            {k: a[k] for k in ("id", "vapi_id", "assistant_name")}
+            for a in listing["assistants"]
+        ]
+        return conditional_json(assistants, listing["modified"])
 
     except Exception as exc:
         app.logger.exception("Failed to fetch assistants for student")
@@ -300,17 +664,8 @@ def list_teacher_assistants():
     try:
         teacher_id = current_teacher(request)
 
-        assistants = db_exec(
-            supabase.table("assistants")
-            .select("id, vapi_id, assistant_name, system_prompt, first_message, description")
-            .eq("teacher_id", teacher_id)
-            .order("created_at", desc=True),
-            context="teacher assistants"
-        )
-
-        response = jsonify(assistants)
-        response.headers.add("Access-Control-Allow-Origin", "*")
-        return response, 200
+        listing = cached_teacher_assistants(teacher_id)
+        return conditional_json(listing["assistants"], listing["modified"])
 
     except Exception as exc:
         app.logger.exception("Failed to fetch teacher assistants")
@@ -330,32 +685,451 @@ def get_teacher_calls():
     try:
         teacher_id = current_teacher(request)
 
-        # Get assistant IDs for this teacher
-        assistant_rows = db_exec(
-            supabase.table("assistants")
-            .select("id")
-            .eq("teacher_id", teacher_id),
-            context="get assistant ids for teacher"
+        try:
+            limit = min(max(int(request.args.get("limit", CALLS_PAGE_DEFAULT)), 1), CALLS_PAGE_MAX)
+            projection = call_projection(request.args.get("fields"))
+            cursor = decode_cursor(request.args["cursor"]) if request.args.get("cursor") else None
+            archived = archived_param(request.args.get("archived"))
+        except ValueError as bad_param:
+            return jsonify({"error": str(bad_param)}), 400
+
+        if not assistant_ids_for(teacher_id):
+            return conditional_json({"calls": [], "nextCursor": None})
+
+        # Keyset pagination on (started_at, id); one extra row tells us if there's a next page
+        call_rows = teacher_calls_page(teacher_id, projection, cursor=cursor, limit=limit + 1, archived=archived)
+
+        next_cursor = encode_cursor(call_rows[limit - 1]) if len(call_rows) > limit else None
+        return conditional_json({"calls": call_rows[:limit], "nextCursor": next_cursor})
+
+    except Exception as e:
+        app.logger.exception("Failed to fetch teacher calls")
+        response = jsonify({"error": str(e)})
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        return response, 500
+
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", "500"))
+
+def export_bound(value: str, *, end: bool = False) -> str:
+    """ISO timestamp for a `from` / `to` export parameter; naive values are UTC
+    and a bare end date includes that whole day."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed.isoformat()
+
+@app.route("/teacher-calls/export-link", methods=["POST", "OPTIONS"])
+def create_export_link():
+    """Signed /teacher-calls/export URL for a plain download; the client adds
+    the export's own query params (format, from, to, ...) to it."""
+    if request.method == "OPTIONS":
+        response = jsonify({})
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        response.headers.add("Access-Control-Allow-Headers", "Content-Type,Authorization")
+        response.headers.add("Access-Control-Allow-Methods", "POST,OPTIONS")
+        return response
+
+    try:
+        teacher_id = current_teacher(request)
+        response = jsonify(signed_link("/teacher-calls/export", "export", teacher_id))
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        return response
+
+    except Exception as e:
+        app.logger.exception("Failed to sign export link")
+        response = jsonify({"error": str(e)})
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        return response, 500
+
+@app.route("/teacher-calls/export", methods=["GET", "OPTIONS"])
+def export_teacher_calls():
+    """Stream a teacher's calls as NDJSON or CSV, one Supabase page at a time.
+
+    Query params: format (ndjson|csv), from / to (ISO dates),
+    assistantRowId (the assistants row id, not the Vapi assistant id),
+    archived and fields (as for /teacher-calls; fields defaults to every
+    column) and gzip=1.
+    """
+    if request.method == "OPTIONS":
+        response = jsonify({})
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        response.headers.add("Access-Control-Allow-Headers", "Content-Type,Authorization")
+        response.headers.add("Access-Control-Allow-Methods", "GET,OPTIONS")
+        return response
+
+    try:
+        # Export links are plain downloads; see /teacher-calls/export-link
+        teacher_id = link_teacher(request, "export")
+
+        try:
+            export_format = request.args.get("format", "ndjson")
+            if export_format not in call_export.FORMATS:
+                raise ValueError(f"format must be one of: {', '.join(call_export.FORMATS)}")
+            fields = call_fields(request.args.get("fields") or ",".join(CALL_LIGHT_FIELDS + CALL_HEAVY_FIELDS))
+            filters = {
+                "since": export_bound(request.args["from"]) if request.args.get("from") else None,
+                "until": export_bound(request.args["to"], end=True) if request.args.get("to") else None,
+                "assistant_id": request.args.get("assistantRowId"),
+                "archived": archived_param(request.args.get("archived")),
+            }
+        except ValueError as bad_param:
+            return jsonify({"error": str(bad_param)}), 400
+
+        pages = iter_teacher_calls(
+            teacher_id,
+            ", ".join(fields + [CALL_ASSISTANT_EMBED]),
+            page_size=EXPORT_PAGE_SIZE,
+            context="export teacher calls",
+            **filters,
         )
-        assistant_ids = [a["id"] for a in assistant_rows]
-        if not assistant_ids:
-            return jsonify([]), 200
+        # Read the first page before any header goes out, so a bad filter or a
+        # DB error is an error response rather than a truncated 200
+        pages = itertools.chain([next(pages, [])], pages)
+
+        def generate():
+            chunks = (
+                call_export.csv_chunks(pages, fields + ["assistant_name"])
+                if export_format == "csv" else call_export.ndjson_chunks(pages)
+            )
+            try:
+                yield from chunks
+            except Exception:
+                # Headers are long gone: re-raise so the server drops the connection
+                # and the client sees a failed download, not a short but valid file
+                # (gzip_chunks never gets to write its trailer)
+                app.logger.exception(f"Call export for teacher {teacher_id} failed mid-stream")
+                raise
+
+        mimetype, extension = call_export.FORMATS[export_format]
+        body = generate()
+        filename = f"calls-{datetime.now(timezone.utc):%Y%m%d}.{extension}"
+        if request.args.get("gzip") in ("1", "true"):
+            body = call_export.gzip_chunks(body, level=COMPRESSION["gzip_level"])
+            mimetype, filename = "application/gzip", f"{filename}.gz"
+
+        response = Response(body, content_type=mimetype)
+        response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+        # Let reverse proxies pass each page through as soon as it's written
+        response.headers["X-Accel-Buffering"] = "no"
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        return response
 
-        # Fetch calls with assistant names
-        call_rows = db_exec(
+    except PermissionError as exc:
+        response = jsonify({"error": str(exc)})
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        return response, 401
+
+    except Exception as e:
+        app.logger.exception("Failed to export teacher calls")
+        response = jsonify({"error": str(e)})
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        return response, 500
+
+# call id -> raw transcript counts from transcript_analytics.analyze_calls
+call_metrics = TTLCache(max_entries=int(os.getenv("CALL_METRICS_CACHE_SIZE", "50000")), ttl=24 * 3600)
+
+def record_call_metrics(call_id: str, transcript: str | None, duration_sec: float | None):
+    try:
+        call_metrics.set(call_id, analyze_calls([transcript or ""], [duration_sec])[0])
+    except Exception as exc:
+        app.logger.warning(f"Failed to analyze transcript for call {call_id}: {exc}")
+
+search_index = TranscriptSearchIndex(os.getenv("SEARCH_INDEX_PATH", "search_index.db"))
+
+def index_call_report(call_id: str, teacher_id: str | None, info: dict, summary: str | None, transcript: str | None):
+    if not teacher_id:
+        return
+    started_at = info.get("startTime")
+    try:
+        search_index.upsert({
+            "id": call_id,
+            "teacher_id": teacher_id,
+            "started_at": datetime.fromtimestamp(started_at, timezone.utc).isoformat() if started_at else None,
+            "student_name": info.get("student"),
+            "summary": summary,
+            "transcript": transcript,
+        })
+    except Exception as exc:
+        app.logger.warning(f"Failed to index call {call_id} for search: {exc}")
+
+def rebuild_search_index(page_size: int = 500) -> int:
+    """Re-index every call from the calls table, paging by id. Returns the call count."""
+    last_id, total = None, 0
+    while True:
+        query = (
             supabase.table("calls")
-            .select("id, student_name, recording_url, summary, transcript, duration_sec, started_at, viewed, assistant:assistant_id(assistant_name)")
-            .in_("assistant_id", assistant_ids)
-            .order("started_at", desc=True),
-            context="get teacher calls"
+            .select("id, student_name, summary, transcript, started_at, assistant:assistant_id!inner(teacher_id)")
+            .order("id")
+            .limit(page_size)
         )
+        if last_id:
+            query = query.gt("id", last_id)
+        rows = db_exec(query, context="rebuild search index")
+        search_index.upsert_many([{**r, "teacher_id": (r.get("assistant") or {}).get("teacher_id")} for r in rows])
+        total += len(rows)
+        if len(rows) < page_size:
+            break
+        last_id = rows[-1]["id"]
+    search_index.optimize()
+    return total
+
+@app.cli.command("rebuild-search-index")
+def rebuild_search_index_command():
+    """Rebuild the local transcript search index from Supabase."""
+    print(f"Indexed {rebuild_search_index()} calls")
+
+def rebuild_search_index_if_empty():
+    try:
+        if search_index.is_empty():
+            app.logger.info(f"Search index empty; indexed {rebuild_search_index()} calls")
+    except Exception:
+        app.logger.exception("Search index rebuild failed")
+
+if os.getenv("SEARCH_REBUILD_ON_START", "true").lower() != "false":
+    socketio.start_background_task(rebuild_search_index_if_empty)
+
+@app.route("/teacher/search", methods=["GET", "OPTIONS"])
+def search_calls():
+    """Ranked full-text search over the teacher's call summaries and transcripts."""
+    if request.method == "OPTIONS":
+        response = jsonify({})
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        response.headers.add("Access-Control-Allow-Headers", "Content-Type,Authorization")
+        response.headers.add("Access-Control-Allow-Methods", "GET,OPTIONS")
+        return response
+
+    try:
+        teacher_id = current_teacher(request)
+        q = request.args.get("q", "")
+        try:
+            limit = min(max(int(request.args.get("limit", 20)), 1), 100)
+            offset = max(int(request.args.get("offset", 0)), 0)
+        except ValueError:
+            return jsonify({"error": "limit and offset must be integers"}), 400
+
+        # Fetch one extra row to know whether another page exists
+        results = search_index.search(teacher_id, q, limit=limit + 1, offset=offset)
+        next_offset = offset + limit if len(results) > limit else None
 
-        response = jsonify(call_rows)
+        response = jsonify({"results": results[:limit], "nextOffset": next_offset})
         response.headers.add("Access-Control-Allow-Origin", "*")
         return response, 200
 
     except Exception as e:
-        app.logger.exception("Failed to fetch teacher calls")
+        app.logger.exception("Failed to search calls")
+        response = jsonify({"error": str(e)})
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        return response, 500
+
+@app.route("/teacher/student-metrics", methods=["GET", "OPTIONS"])
+def get_student_metrics():
+    """Per-student speaking metrics across all of the teacher's calls."""
+    if request.method == "OPTIONS":
+        response = jsonify({})
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        response.headers.add("Access-Control-Allow-Headers", "Content-Type,Authorization")
+        response.headers.add("Access-Control-Allow-Methods", "GET,OPTIONS")
+        return response
+
+    try:
+        teacher_id = current_teacher(request)
+        if not assistant_ids_for(teacher_id):
+            return conditional_json({"students": []})
+
+        calls = [
+            row
+            for page in iter_teacher_calls(
+                teacher_id,
+                f"id, started_at, student_name, duration_sec, {CALL_ASSISTANT_EMBED}",
+                context="student metrics call list"
+            )
+            for row in page
+        ]
+
+        # Only transcripts that aren't cached yet are downloaded and analyzed, in batches
+        counts_by_id = {c["id"]: call_metrics.get(c["id"]) for c in calls}
+        missing = [c for c in calls if counts_by_id[c["id"]] is None]
+        for i in range(0, len(missing), 100):
+            batch = missing[i:i + 100]
+            rows = db_exec(
+                supabase.table("calls")
+                .select("id, transcript")
+                .in_("id", [c["id"] for c in batch]),
+                context="student metrics transcripts"
+            )
+            transcripts = {r["id"]: r.get("transcript") or "" for r in rows}
+            counts = analyze_calls([transcripts.get(c["id"], "") for c in batch],
+                                   [c.get("duration_sec") for c in batch])
+            for call, call_counts in zip(batch, counts):
+                counts_by_id[call["id"]] = call_counts
+                call_metrics.set(call["id"], call_counts)
+
+        students = aggregate_by_student([c.get("student_name") for c in calls],
+                                        [counts_by_id[c["id"]] for c in calls])
+        return conditional_json({"students": students})
+
+    except Exception as e:
+        app.logger.exception("Failed to compute student metrics")
+        response = jsonify({"error": str(e)})
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        return response, 500
+
+@app.route("/calls/<call_id>/transcript", methods=["GET", "OPTIONS"])
+def get_call_transcript(call_id):
+    if request.method == "OPTIONS":
+        response = jsonify({})
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        response.headers.add("Access-Control-Allow-Headers", "Content-Type,Authorization")
+        response.headers.add("Access-Control-Allow-Methods", "GET,OPTIONS")
+        return response
+
+    try:
+        teacher_id = current_teacher(request)
+
+        rows = db_exec(
+            supabase.table("calls")
+            .select("id, transcript, summary, assistant:assistant_id!inner(teacher_id)")
+            .eq("id", call_id)
+            .eq("assistant.teacher_id", teacher_id)
+            .limit(1),
+            context="get call transcript"
+        )
+        if not rows:
+            response = jsonify({"error": "Call not found"})
+            response.headers.add("Access-Control-Allow-Origin", "*")
+            return response, 404
+
+        row = rows[0]
+        return conditional_json({"id": row["id"], "transcript": row.get("transcript"), "summary": row.get("summary")})
+
+    except Exception as e:
+        app.logger.exception("Failed to fetch call transcript")
+        response = jsonify({"error": str(e)})
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        return response, 500
+
+recording_cache = RecordingCache(
+    os.getenv("RECORDING_CACHE_DIR", "recording_cache"),
+    int(os.getenv("RECORDING_CACHE_MB", "2048")) * 1024 * 1024,
+    logger=app.logger,
+)
+
+@app.route("/calls/<call_id>/recording-link", methods=["POST", "OPTIONS"])
+def create_recording_link(call_id):
+    """Signed, short-lived URL for one call's recording, for <audio> sources
+    and download links, which can't send the Authorization header."""
+    if request.method == "OPTIONS":
+        response = jsonify({})
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        response.headers.add("Access-Control-Allow-Headers", "Content-Type,Authorization")
+        response.headers.add("Access-Control-Allow-Methods", "POST,OPTIONS")
+        return response
+
+    try:
+        teacher_id = current_teacher(request)
+
+        rows = db_exec(
+            supabase.table("calls")
+            .select("id, assistant:assistant_id!inner(teacher_id)")
+            .eq("id", call_id)
+            .eq("assistant.teacher_id", teacher_id)
+            .limit(1),
+            context="check call owner"
+        )
+        if not rows:
+            response = jsonify({"error": "Call not found"})
+            response.headers.add("Access-Control-Allow-Origin", "*")
+            return response, 404
+
+        response = jsonify(signed_link(f"/calls/{call_id}/recording", f"recording:{call_id}", teacher_id))
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        return response
+
+    except Exception as e:
+        app.logger.exception("Failed to sign recording link")
+        response = jsonify({"error": str(e)})
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        return response, 500
+
+@app.route("/calls/<call_id>/recording", methods=["GET", "OPTIONS"])
+def get_call_recording(call_id):
+    """Serve a call's recording from the local cache, with Range support for seeking."""
+    if request.method == "OPTIONS":
+        response = jsonify({})
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        response.headers.add("Access-Control-Allow-Headers", "Content-Type,Authorization,Range")
+        response.headers.add("Access-Control-Allow-Methods", "GET,OPTIONS")
+        return response
+
+    try:
+        teacher_id = link_teacher(request, f"recording:{call_id}")
+
+        rows = db_exec(
+            supabase.table("calls")
+            .select("id, recording_url, assistant:assistant_id!inner(teacher_id)")
+            .eq("id", call_id)
+            .eq("assistant.teacher_id", teacher_id)
+            .limit(1),
+            context="get call recording"
+        )
+        if not rows or not rows[0].get("recording_url"):
+            response = jsonify({"error": "Recording not found"})
+            response.headers.add("Access-Control-Allow-Origin", "*")
+            return response, 404
+
+        recording_url = rows[0]["recording_url"]
+        extension = os.path.splitext(recording_url.split("?", 1)[0])[1][:8]
+        mimetype = mimetypes.guess_type(f"x{extension}")[0] or "audio/wav"
+        download_name = f"call-{call_id}{extension}"
+
+        # Pinned so eviction can't unlink the file before send_file opens it
+        with recording_cache.pinned(call_id) as path:
+            if path:
+                # conditional=True answers Range and If-None-Match / If-Modified-Since
+                response = send_file(
+                    path,
+                    mimetype=mimetype,
+                    as_attachment=request.args.get("download") == "1",
+                    download_name=download_name,
+                    conditional=True,
+                    max_age=3600,
+                )
+        if not path:
+            # Miss: relay upstream as it arrives (a full fetch also fills the cache),
+            # passing Range through so seeking works before the recording is cached
+            with telemetry.stage("recording fetch"):
+                upstream, chunks = recording_cache.stream(
+                    call_id, recording_url, extension=extension, range_header=request.headers.get("Range")
+                )
+            response = Response(chunks, status=upstream.status_code, mimetype=mimetype, direct_passthrough=True)
+            for header in ("Content-Range", "Accept-Ranges"):
+                if header in upstream.headers:
+                    response.headers[header] = upstream.headers[header]
+            if "Content-Length" in upstream.headers and "Content-Encoding" not in upstream.headers:
+                response.headers["Content-Length"] = upstream.headers["Content-Length"]
+            disposition = "attachment" if request.args.get("download") == "1" else "inline"
+            response.headers["Content-Disposition"] = f'{disposition}; filename="{download_name}"'
+
+        response.headers["Cache-Control"] = "private, max-age=3600"
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        response.headers.add("Access-Control-Expose-Headers", "Content-Range,Accept-Ranges,Content-Length")
+        return response
+
+    except PermissionError as exc:
+        response = jsonify({"error": str(exc)})
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        return response, 401
+
+    except requests.exceptions.RequestException as upstream_error:
+        app.logger.warning(f"Failed to fetch recording for {call_id}: {upstream_error}")
+        response = jsonify({"error": "Recording is not available right now"})
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        return response, 502
+
+    except Exception as e:
+        app.logger.exception("Failed to serve call recording")
         response = jsonify({"error": str(e)})
         response.headers.add("Access-Control-Allow-Origin", "*")
         return response, 500
@@ -370,19 +1144,27 @@ def mark_call_viewed(id):
         return response
 
     try:
+        teacher_id = current_teacher(request)
+
         data = request.get_json()
         if data is None or "viewed" not in data:
             return jsonify({"error": "Missing 'viewed' value in request body"}), 400
 
         viewed_status = bool(data["viewed"])
 
-        # Update the call with the new viewed status
-        db_exec(
+        # Only the teacher's own calls; anything else looks like a missing call
+        assistant_ids = assistant_ids_for(teacher_id)
+        updated = db_exec(
             supabase.table("calls")
             .update({"viewed": viewed_status})
-            .eq("id", id),
+            .eq("id", id)
+            .in_("assistant_id", assistant_ids),
             context="toggle call viewed status"
-        )
+        ) if assistant_ids else []
+        if not updated:
+            response = jsonify({"error": "Call not found"})
+            response.headers.add("Access-Control-Allow-Origin", "*")
+            return response, 404
 
         response = jsonify({"success": True, "viewed": viewed_status})
         response.headers.add("Access-Control-Allow-Origin", "*")
@@ -394,6 +1176,146 @@ def mark_call_viewed(id):
         response.headers.add("Access-Control-Allow-Origin", "*")
         return response, 500
 
+MAX_BULK_CALLS = int(os.getenv("MAX_BULK_CALLS", "500"))
+
+# operation -> column changes (None means delete the rows)
+BULK_CALL_OPERATIONS = {
+    "mark_viewed": lambda: {"viewed": True},
+    "mark_unviewed": lambda: {"viewed": False},
+    "archive": lambda: {"archived_at": datetime.now(timezone.utc).isoformat()},
+    "unarchive": lambda: {"archived_at": None},
+    "delete": None,
+}
+
+def forget_calls(call_ids: list[str]):
+    """Drop local derived data (search index, metrics, cached recordings) and
+    pending journal writes for deleted calls."""
+    webhook_journal.discard(call_ids)
+    search_index.delete(call_ids)
+    for call_id in call_ids:
+        call_metrics.invalidate(call_id)
+        recording_cache.forget(call_id)
+
+@app.route("/calls/bulk", methods=["POST", "OPTIONS"])
+def bulk_call_operation():
+    """Apply one operation to many calls: {"ids": [...], "operation": "mark_viewed" |
+    "mark_unviewed" | "archive" | "unarchive" | "delete"}.
+
+    Ownership is checked with one query and the change is one `in` update (or
+    delete), so the cost doesn't grow with round trips. Each id gets a status:
+    "ok", "not_found" (missing or another teacher's), "active" (live calls
+    can't be deleted) or "failed".
+    """
+    if request.method == "OPTIONS":
+        response = jsonify({})
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        response.headers.add("Access-Control-Allow-Headers", "Content-Type,Authorization")
+        response.headers.add("Access-Control-Allow-Methods", "POST,OPTIONS")
+        return response
+
+    try:
+        teacher_id = current_teacher(request)
+
+        body = request.get_json(silent=True) or {}
+        operation = body.get("operation")
+        ids = body.get("ids")
+        if operation not in BULK_CALL_OPERATIONS:
+            return jsonify({"error": f"operation must be one of: {', '.join(BULK_CALL_OPERATIONS)}"}), 400
+        if not isinstance(ids, list) or not ids or not all(isinstance(i, str) and i for i in ids):
+            return jsonify({"error": "ids must be a non-empty list of call ids"}), 400
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > MAX_BULK_CALLS:
+            return jsonify({"error": f"At most {MAX_BULK_CALLS} calls per request"}), 400
+
+        statuses = dict.fromkeys(ids, "not_found")
+        assistant_ids = assistant_ids_for(teacher_id)
+        owned = [
+            row["id"] for row in db_exec(
+                supabase.table("calls")
+                .select("id")
+                .in_("id", ids)
+                .in_("assistant_id", assistant_ids),
+                context="bulk call ownership"
+            )
+        ] if assistant_ids else []
+
+        if operation == "delete":
+            for call_id in owned:
+                if call_id in active_calls:
+                    statuses[call_id] = "active"
+            owned = [call_id for call_id in owned if statuses[call_id] != "active"]
+
+        if owned:
+            table = supabase.table("calls")
+            changes = BULK_CALL_OPERATIONS[operation]
+            query = table.delete() if changes is None else table.update(changes())
+            try:
+                db_exec(query.in_("id", owned), context=f"bulk call {operation}")
+            except Exception as exc:
+                app.logger.warning(f"Bulk {operation} of {len(owned)} calls failed: {exc}")
+                statuses.update(dict.fromkeys(owned, "failed"))
+            else:
+                statuses.update(dict.fromkeys(owned, "ok"))
+                if changes is None:
+                    forget_calls(owned)
+
+        response = jsonify({
+            "operation": operation,
+            "applied": sum(1 for status in statuses.values() if status == "ok"),
+            "results": [{"id": call_id, "status": statuses[call_id]} for call_id in ids],
+        })
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        return response, 200
+
+    except Exception as e:
+        app.logger.exception("Bulk call operation failed")
+        response = jsonify({"error": str(e)})
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        return response, 500
+
+def lookup_assistant_by_vapi_id(vapi_assistant_id: str) -> dict:
+    return db_exec(
+        supabase.table("assistants")
+        .select("id, teacher_id")
+        .eq("vapi_id", vapi_assistant_id)
+        .single(),
+        context="lookup assistant by vapi_id"
+    )
+
+def register_active_call(call_id: str, student_name: str, *, vapi_assistant_id: str, teacher_id: str) -> dict:
+    # Monitor URLs arrive later via the "call_monitor_ready" event
+    call_info = {
+        "callId": call_id,
+        "student": student_name,
+        "listenUrl": None,
+        "controlUrl": None,
+        "startTime": time.time(),
+        "assistantId": vapi_assistant_id,
+        "teacherId": teacher_id,
+    }
+    active_calls.put(call_id, call_info)
+    call_lifecycle.track(call_id, call_info["startTime"])
+    return call_info
+
+def launch_call(student_name: str, student_number: str, *, vapi_assistant_id: str,
+                db_assistant_id: str, teacher_id: str) -> str:
+    """Place the Vapi call, record it and announce it to the teacher; returns the call id."""
+    call_id = start_call(vapi_assistant_id, student_name, student_number)
+    call_info = register_active_call(call_id, student_name, vapi_assistant_id=vapi_assistant_id, teacher_id=teacher_id)
+
+    try:
+        supabase.table("calls").insert({
+            "id": call_id,
+            "assistant_id": db_assistant_id,
+            "student_name": student_name,
+        }).execute()
+    except Exception as db_error:
+        app.logger.warning(f"Failed to save call to database: {db_error}")
+
+    teacher_events.emit("new_call", call_info, teacher_room(teacher_id))
+    socketio.start_background_task(watch_call_monitor, call_id)
+    return call_id
+
 @app.route("/start-call", methods=["POST", "OPTIONS"])
 def start_phone_call():
     if request.method == "OPTIONS":
@@ -411,39 +1333,14 @@ def start_phone_call():
         if not all([vapi_assistant_id, student_name, student_number]):
             return jsonify({"error": "assistantId, studentName, studentNumber are required"}), 400
 
-        assistant_row = db_exec(
-            supabase.table("assistants")
-            .select("id")
-            .eq("vapi_id", vapi_assistant_id)
-            .single(),
-            context="lookup assistant by vapi_id"
+        assistant_row = lookup_assistant_by_vapi_id(vapi_assistant_id)
+        call_id = launch_call(
+            student_name,
+            student_number,
+            vapi_assistant_id=vapi_assistant_id,
+            db_assistant_id=assistant_row["id"],
+            teacher_id=assistant_row["teacher_id"],
         )
-        db_assistant_id = assistant_row["id"]
-
-        call_id = start_call(vapi_assistant_id, student_name, student_number)
-        listen_url = poll_listen_url(call_id)
-        control_url = poll_control_url(call_id)
-
-        call_info = {
-            "callId": call_id,
-            "student": student_name,
-            "listenUrl": listen_url,
-            "controlUrl": control_url,
-            "startTime": time.time(),
-            "assistantId": vapi_assistant_id,
-        }
-        active_calls[call_id] = call_info
-
-        try:
-            supabase.table("calls").insert({
-                "id": call_id,
-                "assistant_id": db_assistant_id,
-                "student_name": student_name,
-            }).execute()
-        except Exception as db_error:
-            app.logger.warning(f"Failed to save call to database: {db_error}")
-
-        socketio.emit("new_call", call_info, namespace="/teacher")
         
         response = jsonify({"success": True, "callId": call_id})
         response.headers.add("Access-Control-Allow-Origin", "*")
@@ -455,67 +1352,307 @@ def start_phone_call():
         response.headers.add("Access-Control-Allow-Origin", "*")
         return response, 500
 
-@app.route("/vapi-webhook", methods=["POST"])
-def vapi_webhook():
-    """Handle status updates and end‑of‑call reports from Vapi."""
+MAX_BATCH_STUDENTS = int(os.getenv("MAX_BATCH_STUDENTS", "200"))
+call_batches = TTLCache(max_entries=1000, ttl=int(os.getenv("BATCH_RETENTION_SEC", "86400")))
+
+def report_batch_progress(batch: CallBatch, index: int):
+    snapshot = batch.snapshot()
+    socketio.emit("batch_progress", {
+        "batchId": batch.id,
+        "index": index,
+        **snapshot["students"][index],
+        "completed": snapshot["completed"],
+        "total": snapshot["total"],
+        "status": snapshot["status"],
+    }, namespace="/teacher", to=teacher_room(batch.teacher_id))
+
+batch_launcher = BatchCallLauncher(
+    launch_call,
+    report_batch_progress,
+    workers=int(os.getenv("BATCH_WORKERS", "4")),
+    rate=float(os.getenv("VAPI_CALLS_PER_SEC", "2")),
+    burst=int(os.getenv("VAPI_CALL_BURST", "5")),
+    sleep=socketio.sleep,
+    logger=app.logger,
+)
+batch_launcher.start(socketio.start_background_task)
+
+@app.route("/start-calls/batch", methods=["POST", "OPTIONS"])
+def start_call_batch():
+    """Start calls for a roster in the background; progress arrives as "batch_progress" events."""
+    if request.method == "OPTIONS":
+        response = jsonify({})
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        response.headers.add('Access-Control-Allow-Headers', "Content-Type,Authorization")
+        response.headers.add('Access-Control-Allow-Methods', "POST,OPTIONS")
+        return response
+
     try:
-        evt = request.json or {}
-        msg = evt.get("message", {})
-        mtype = msg.get("type")
-        call = msg.get("call", {})
-        call_id = call.get("id")
-
-        if mtype == "status-update":
-            status = msg.get("status")
-            if status in {"ended", "failed", "busy", "no-answer"} and call_id in active_calls:
-                info = active_calls[call_id]
-                info["duration"] = time.time() - info["startTime"]
-                socketio.emit("call_ended", {
-                    **info,
-                    "endTime": time.time(),
-                }, namespace="/teacher")
-                active_calls.pop(call_id, None)
-
-        elif mtype == "end-of-call-report":
-            recording_url = msg.get("recordingUrl")
-            summary = msg.get("summary")
-            transcript = msg.get("transcript")
-            raw_duration = active_calls.get(call_id, {}).get("duration")
-
-            socketio.emit(
-                "call_report",
-                {
-                    "callId": call_id,
-                    "student": active_calls.get(call_id, {}).get("student", "Unknown"),
-                    "recordingUrl": recording_url,
-                    "summary": summary,
-                    "transcript": transcript,
-                    "endedReason": msg.get("endedReason"),
-                    "timestamp": time.time(),
-                },
-                namespace="/teacher",
-            )
+        teacher_id = current_teacher(request)
+        body = request.get_json(silent=True) or {}
+        vapi_assistant_id = body.get("assistantId")
+        students = body.get("students") or []
+        if not vapi_assistant_id or not isinstance(students, list) or not students:
+            return jsonify({"error": "assistantId and a non-empty students list are required"}), 400
+        if len(students) > MAX_BATCH_STUDENTS:
+            return jsonify({"error": f"At most {MAX_BATCH_STUDENTS} students per batch"}), 400
+        if not all(isinstance(s, dict) and s.get("studentName") and s.get("studentNumber") for s in students):
+            return jsonify({"error": "Every student needs studentName and studentNumber"}), 400
+
+        # One assistant lookup for the whole roster
+        assistant_row = lookup_assistant_by_vapi_id(vapi_assistant_id)
+        if assistant_row["teacher_id"] != teacher_id:
+            return jsonify({"error": "Forbidden"}), 403
+
+        batch = CallBatch(teacher_id, vapi_assistant_id, students)
+        call_batches.set(batch.id, batch)
+        batch_launcher.submit(batch, students, {
+            "vapi_assistant_id": vapi_assistant_id,
+            "db_assistant_id": assistant_row["id"],
+            "teacher_id": teacher_id,
+        })
+
+        response = jsonify({"success": True, "batchId": batch.id, "total": len(students)})
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        return response, 202
+
+    except Exception as exc:
+        app.logger.exception("Error starting call batch")
+        response = jsonify({"error": str(exc)})
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        return response, 500
+
+@app.route("/start-calls/batch/<batch_id>", methods=["GET", "OPTIONS"])
+def get_call_batch(batch_id):
+    if request.method == "OPTIONS":
+        response = jsonify({})
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        response.headers.add('Access-Control-Allow-Headers', "Content-Type,Authorization")
+        response.headers.add('Access-Control-Allow-Methods', "GET,OPTIONS")
+        return response
 
+    try:
+        teacher_id = current_teacher(request)
+        batch = call_batches.get(batch_id)
+        if batch is None or batch.teacher_id != teacher_id:
+            return jsonify({"error": "Batch not found"}), 404
+
+        response = jsonify(batch.snapshot())
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        return response, 200
+
+    except Exception as exc:
+        app.logger.exception("Error fetching call batch")
+        response = jsonify({"error": str(exc)})
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        return response, 500
+
+def end_active_call(call_id: str) -> dict | None:
+    """Drop a call from the active registry, tear down its live streams and
+    tell its teacher. Only the caller that actually removed it emits call_ended."""
+    info = active_calls.pop(call_id)
+    audio_fanout.stop(call_id)
+    control_pipeline.close(call_id)
+    if transcript_relay:
+        transcript_relay.stop(call_id)
+    if info is not None:
+        info["duration"] = time.time() - info["startTime"]
+        recently_ended_calls.set(call_id, info)
+        if info.get("teacherId"):
+            teacher_events.emit("call_ended", {
+                **info,
+                "endTime": time.time(),
+            }, teacher_room(info["teacherId"]))
+    return info
+
+def refresh_monitor_urls(call_id: str, vapi_call: dict):
+    monitor = vapi_call.get("monitor") or {}
+    info = active_calls.get(call_id)
+    if info and not info.get("listenUrl") and monitor.get("listenUrl"):
+        info = active_calls.update(call_id, listenUrl=monitor["listenUrl"], controlUrl=monitor.get("controlUrl"))
+        if info:
+            socketio.emit("call_monitor_ready", info, namespace="/teacher", to=teacher_room(info["teacherId"]))
+
+CALL_MAX_AGE = int(os.getenv("CALL_MAX_AGE_SEC", str(3 * 3600)))
+
+call_lifecycle = CallLifecycle(
+    active_calls,
+    list_calls=lambda created_after: vapi.list_calls(
+        created_after=datetime.fromtimestamp(created_after, timezone.utc).isoformat()
+    ),
+    get_call=vapi.get_call,
+    on_ended=lambda call_id, vapi_call: end_active_call(call_id),
+    on_active=refresh_monitor_urls,
+    first_check=int(os.getenv("CALL_FIRST_CHECK_SEC", "900")),
+    recheck_after=int(os.getenv("CALL_RECHECK_SEC", "300")),
+    max_age=CALL_MAX_AGE,
+    interval=int(os.getenv("CALL_RECONCILE_INTERVAL_SEC", "30")),
+    logger=app.logger,
+)
+
+def rehydrate_active_calls():
+    """Re-register calls that were live when the process went down.
+
+    Calls still in a shared (Redis) store are simply re-armed. Calls started
+    within CALL_MAX_AGE that have no end-of-call report yet are restored from
+    the calls table and checked against Vapi on the next lifecycle tick. The
+    report is detected by duration_sec, which the journal writes for every
+    report; summary is missing for busy, no-answer and very short calls.
+    """
+    for info in active_calls.values():
+        call_lifecycle.track(info["callId"], info.get("startTime"))
+
+    cutoff = datetime.fromtimestamp(time.time() - CALL_MAX_AGE, timezone.utc).isoformat()
+    rows = db_exec(
+        supabase.table("calls")
+        .select("id, student_name, started_at, assistant:assistant_id!inner(vapi_id, teacher_id)")
+        .is_("duration_sec", "null")
+        .gte("started_at", cutoff)
+        .limit(1000),
+        context="rehydrate active calls"
+    )
+    restored = 0
+    for row in rows:
+        if row["id"] in active_calls:
+            continue
+        started = datetime.fromisoformat(row["started_at"]).timestamp() if row.get("started_at") else time.time()
+        active_calls.put(row["id"], {
+            "callId": row["id"],
+            "student": row.get("student_name"),
+            "listenUrl": None,
+            "controlUrl": None,
+            "startTime": started,
+            "assistantId": row["assistant"]["vapi_id"],
+            "teacherId": row["assistant"]["teacher_id"],
+        })
+        call_lifecycle.track(row["id"], started, delay=0)
+        restored += 1
+    if restored:
+        app.logger.info(f"Rehydrated {restored} possibly in-flight calls")
+
+def start_call_lifecycle():
+    try:
+        rehydrate_active_calls()
+    except Exception:
+        app.logger.exception("Active call rehydration failed")
+    call_lifecycle.start(socketio.start_background_task, socketio.sleep)
+
+if os.getenv("CALL_LIFECYCLE", "true").lower() != "false":
+    socketio.start_background_task(start_call_lifecycle)
+
+def report_duration(msg: dict, info: dict) -> float | None:
+    """Call length for an end-of-call report. The report's own timing comes
+    first: the active entry is usually gone by now (the status-update ended it)."""
+    if msg.get("durationSeconds") is not None:
+        return float(msg["durationSeconds"])
+    for source in (msg, msg.get("call") or {}):
+        started, ended = source.get("startedAt"), source.get("endedAt")
+        if started and ended:
             try:
-                duration = int(raw_duration) if raw_duration is not None else 0
-                db_exec(
-                    supabase.table("calls").update({
-                        "recording_url": recording_url,
-                        "summary": summary,
-                        "transcript": transcript,
-                        "duration_sec": duration,
-                    }).eq("id", call_id),
-                    context="update call with end-of-call-report"
-                )
-            except Exception as db_error:
-                app.logger.warning(f"Failed to update call in database: {db_error}")
+                return (datetime.fromisoformat(ended) - datetime.fromisoformat(started)).total_seconds()
+            except ValueError:
+                pass
+    if info.get("duration") is not None:
+        return info["duration"]
+    return time.time() - info["startTime"] if info.get("startTime") else None
+
+ENDED_STATUSES = {"ended", "failed", "busy", "no-answer"}
+
+def call_report_event(call_id: str, info: dict, msg: dict) -> dict:
+    """call_report payload for the teacher, from an end-of-call report."""
+    return {
+        "callId": call_id,
+        "student": info.get("student", "Unknown"),
+        "recordingUrl": msg.get("recordingUrl"),
+        "summary": msg.get("summary"),
+        "transcript": msg.get("transcript"),
+        "endedReason": msg.get("endedReason"),
+        "timestamp": time.time(),
+    }
+
+def persist_call_report(call_id: str, teacher_id: str | None, info: dict, msg: dict, raw_duration: float | None):
+    """Journal the report for the calls table, then update metrics and the search index."""
+    transcript = msg.get("transcript")
+    # Persisted by the journal writer; the webhook only waits on a local append
+    webhook_journal.append(call_id, {
+        "id": call_id,
+        "recording_url": msg.get("recordingUrl"),
+        "summary": msg.get("summary"),
+        "transcript": transcript,
+        "duration_sec": int(raw_duration) if raw_duration is not None else 0,
+    })
+    record_call_metrics(call_id, transcript, raw_duration)
+    index_call_report(call_id, teacher_id, info, msg.get("summary"), transcript)
+
+def handle_vapi_event(evt: dict):
+    """Apply one Vapi server message: status updates and end‑of‑call reports."""
+    msg = evt.get("message", {})
+    mtype = msg.get("type")
+    call = msg.get("call", {})
+    call_id = call.get("id")
+
+    if mtype == "status-update":
+        if call_id and msg.get("status") in ENDED_STATUSES:
+            end_active_call(call_id)
+
+    elif mtype == "end-of-call-report" and call_id:
+        info = active_calls.get(call_id) or recently_ended_calls.get(call_id) or {}
+        raw_duration = report_duration(msg, info)
+
+        teacher_id = teacher_for_call(call_id, info)
+        if teacher_id:
+            teacher_events.emit("call_report", call_report_event(call_id, info, msg), teacher_room(teacher_id))
+
+        persist_call_report(call_id, teacher_id, info, msg, raw_duration)
+        # Normally already done by the status-update; covers a missed one
+        end_active_call(call_id)
 
-            active_calls.pop(call_id, None)
+@app.route("/vapi-webhook", methods=["POST"])
+def vapi_webhook():
+    """Handle status updates and end‑of‑call reports from Vapi."""
+    try:
+        handle_vapi_event(request.json or {})
         return "", 200
     except Exception as exc:
         app.logger.exception("Webhook error")
         return "", 200
     
+def deliver_control(call_id: str, kind: str, payload: dict):
+    if kind == "say":
+        control_url = payload["controlUrl"]
+        resp = vapi.send_control(control_url, {k: v for k, v in payload.items() if k != "controlUrl"})
+        if not resp.ok:
+            raise RuntimeError(f"Vapi control returned {resp.status_code}: {resp.text[:200]}")
+    elif kind == "message":
+        # Students on the call page joined this room via "join_call"
+        socketio.emit("live_message", {"callId": call_id, "message": payload["content"]}, room=call_id)
+    else:
+        raise ValueError(f"Unknown control message kind: {kind}")
+
+def notify_control_ack(target: tuple[str, str], ack: dict):
+    namespace, to = target
+    socketio.emit("control_ack", ack, namespace=namespace, to=to)
+
+control_pipeline = ControlPipeline(
+    deliver_control,
+    notify_control_ack,
+    socketio.start_background_task,
+    socketio.sleep,
+    coalesce_window=int(os.getenv("CONTROL_COALESCE_MS", "300")) / 1000,
+    max_queue=int(os.getenv("CONTROL_MAX_QUEUE", "50")),
+    max_failures=int(os.getenv("CONTROL_MAX_FAILURES", "3")),
+    logger=app.logger,
+)
+
+def call_for_control_url(call_id: str | None, control_url: str) -> tuple[str, dict | None]:
+    """Resolve the call a controlUrl belongs to, so HTTP and socket messages share its queue."""
+    if call_id:
+        return call_id, active_calls.get(call_id)
+    for info in active_calls.values():
+        if info.get("controlUrl") == control_url:
+            return info["callId"], info
+    return control_url, None
+
 @app.route("/send-control-message", methods=["POST", "OPTIONS"])
 def send_control_message():
     if request.method == "OPTIONS":
@@ -540,17 +1677,18 @@ def send_control_message():
             "endCallAfterSpoken": end_call
         }
 
-        resp = requests.post(
-            control_url,
-            json=payload,
-            headers={"Content-Type": "application/json"},
-            timeout=10
-        )
-
-        if not resp.ok:
-            return jsonify({"error": "Failed to send control message", "details": resp.text}), 502
+        call_id, info = call_for_control_url(data.get("callId"), control_url)
+        teacher_id = info.get("teacherId") if info else None
+        try:
+            message_id = control_pipeline.enqueue(
+                call_id, "say", {"controlUrl": control_url, **payload},
+                ("/teacher", teacher_room(teacher_id)) if teacher_id else None,
+            )
+        except OverflowError as full:
+            return jsonify({"error": str(full)}), 429
 
-        return jsonify({"success": True, "status": resp.status_code}), 200
+        # Delivery is reported later through a "control_ack" event
+        return jsonify({"success": True, "callId": call_id, "messageId": message_id}), 202
 
     except Exception as exc:
         app.logger.exception("Failed to send control message")
@@ -565,39 +1703,107 @@ def get_active_calls():
         response.headers.add('Access-Control-Allow-Methods', "GET,OPTIONS")
         return response
         
-    response = jsonify(list(active_calls.values()))
+    try:
+        teacher_id = current_teacher(request)
+    except PermissionError as exc:
+        response = jsonify({"error": str(exc)})
+        response.headers.add("Access-Control-Allow-Origin", "*")
+        return response, 401
+
+    response = jsonify([c for c in active_calls.values() if c.get("teacherId") == teacher_id])
     response.headers.add("Access-Control-Allow-Origin", "*")
     return response
 
+def teacher_socket_snapshot(teacher_id: str, auth: dict | None) -> tuple[str, object]:
+    """(variant room, encoded active_calls snapshot) for a newly connected teacher socket."""
+    encoding, deltas = client_options(auth)
+    calls = [c for c in active_calls.values() if c.get("teacherId") == teacher_id]
+    snapshot = snapshot_delta(calls, (auth or {}).get("knownCalls")) if deltas else calls
+    return variant_room(teacher_room(teacher_id), encoding, deltas), encode(snapshot, encoding)
+
 @socketio.on("connect", namespace="/teacher")
-def teacher_connect():
-    emit("active_calls", list(active_calls.values()))
+def teacher_connect(auth=None):
+    """Authenticate the teacher socket and join it to that teacher's room.
+
+    `auth` may also carry `encoding` ("json" or "msgpack") and `deltas`; with
+    deltas, `knownCalls` ({callId: version} the client already shows) turns
+    the active_calls snapshot into {delta, upsert, remove, versions}."""
+    token = (auth or {}).get("token") or request.args.get("token")
+    try:
+        if not token:
+            raise PermissionError("Missing token")
+        teacher_id = token_verifier.verify(token)
+    except Exception as e:
+        app.logger.warning(f"Teacher socket auth failed: {e}")
+        raise ConnectionRefusedError("unauthorized")
+
+    variant, snapshot = teacher_socket_snapshot(teacher_id, auth)
+    join_room(teacher_room(teacher_id))
+    join_room(variant)
+    variant_members.join(variant)
+    socket_variants[request.sid] = variant
+    telemetry.socket_connections.labels("/teacher").inc()
+    emit("active_calls", snapshot)
 
 @socketio.on("disconnect", namespace="/teacher")
 def teacher_disconnect():
-    pass
+    telemetry.socket_connections.labels("/teacher").dec()
+    variant = socket_variants.pop(request.sid, None)
+    if variant:
+        variant_members.leave(variant)
+    audio_fanout.remove_listener(request.sid)
+
+@socketio.on("listen_start", namespace="/teacher")
+def handle_listen_start(data):
+    """Subscribe this socket to a call's audio; the ack carries the PCM format."""
+    call_id = (data or {}).get("callId")
+    info = active_calls.get(call_id) if call_id else None
+    if not info or teacher_room(info.get("teacherId")) not in rooms():
+        return {"error": "Unknown call"}
+    if not info.get("listenUrl"):
+        return {"error": "Call audio not ready yet"}
+    return {"callId": call_id, **audio_fanout.subscribe(call_id, info["listenUrl"], request.sid)}
+
+@socketio.on("listen_stop", namespace="/teacher")
+def handle_listen_stop(data):
+    call_id = (data or {}).get("callId")
+    if call_id:
+        audio_fanout.unsubscribe(call_id, request.sid)
+
+@socketio.on("transcript_history", namespace="/teacher")
+def handle_transcript_history(data):
+    """Catch a late-joining teacher up on a live call's transcript (returned via ack)."""
+    call_id = (data or {}).get("callId")
+    info = active_calls.get(call_id) if call_id else None
+    if not info or teacher_room(info.get("teacherId")) not in rooms():
+        return {"error": "Unknown call"}
+    segments = transcript_relay.history(call_id) if transcript_relay else []
+    return {"callId": call_id, "segments": segments}
+
+@socketio.on("connect")
+def default_connect(auth=None):
+    telemetry.socket_connections.labels("/").inc()
+
+@socketio.on("disconnect")
+def default_disconnect():
+    telemetry.socket_connections.labels("/").dec()
 
 @socketio.on("live_message")
-def handle_live_message(data, ack=None):
+def handle_live_message(data):
+    """Queue a message for the students on a call. The return value is the
+    client's ack; a "control_ack" event follows once it has been delivered."""
     try:
         call_id = data.get("callId")
         message = data.get("message")
 
         if not call_id or not message:
-            if ack:
-                ack({"error": "Missing callId or message"})
-            return
-
-        # Emit to the call room (students should have joined this room)
-        socketio.emit("live_message", {"callId": call_id, "message": message}, room=call_id)
+            return {"error": "Missing callId or message"}
 
-        # Acknowledge success
-        if ack:
-            ack({"success": True})
+        message_id = control_pipeline.enqueue(call_id, "message", {"content": message}, ("/", request.sid))
+        return {"success": True, "messageId": message_id}
     except Exception as e:
         app.logger.exception("Error in live_message handler")
-        if ack:
-            ack({"error": str(e)})
+        return {"error": str(e)}
 
 @socketio.on("join_call")
 def handle_join_call(data):
@@ -608,4 +1814,15 @@ def handle_join_call(data):
 
 if __name__ == "__main__":
     app.logger.info("🚀 Language Learning Hub backend starting…")
-    socketio.run(app, host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
+    if SERVER_MODE == "asgi":
+        # asgi_server does `import app`; reuse this module rather than loading a second copy
+        sys.modules.setdefault("app", sys.modules[__name__])
+        import asgi_server
+        asgi_server.main()
+        sys.exit()
+    socketio.run(
+        app,
+        host="0.0.0.0",
+        port=int(os.getenv("PORT", "5000")),
+        debug=os.getenv("FLASK_DEBUG", "1") != "0",
+    )
\ No newline at end of file
@@ -0,0 +1,571 @@
+"""Asyncio server mode: `SERVER_MODE=asgi python app.py` (or `python asgi_server.py`).
+
+Socket.IO runs on python-socketio's AsyncServer, and the busiest HTTP
+routes (/start-call, /vapi-webhook, /teacher-calls, /teacher/assistants,
+/assistants/by-key/<key>, /active-calls) are served natively with httpx and
+supabase's async client. Every other route is the Flask app from app.py,
+run in a thread pool through a2wsgi, so both modes expose the same API.
+
+app.py's background workers (journal writer, batch launcher, control
+pipeline, audio fan-out, call lifecycle) run as threads in this mode; the
+events they emit through `app.socketio` are forwarded to the AsyncServer.
+With REDIS_URL set, the active-call store and those emits are Redis round
+trips, so handlers reach them through `off_loop`.
+"""
+import os
+
+os.environ.setdefault("SERVER_MODE", "asgi")
+
+import asyncio, hashlib, json, re, time
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import parse_qs
+
+import socketio
+import uvicorn
+from a2wsgi import WSGIMiddleware
+from supabase import acreate_client
+
+import app as backend
+import compression, telemetry
+from async_clients import AsyncVapiClient, adb_exec
+
+if backend.SERVER_MODE != "asgi":
+    raise RuntimeError("asgi_server requires SERVER_MODE=asgi before app.py is imported")
+
+logger = backend.app.logger
+
+# Same channel Flask-SocketIO uses, so other workers' emits reach our sockets
+sio = socketio.AsyncServer(
+    async_mode="asgi",
+    cors_allowed_origins="*",
+    client_manager=socketio.AsyncRedisManager(backend.REDIS_URL, channel="flask-socketio") if backend.REDIS_URL else None,
+)
+
+
+class LoopBridgeManager(socketio.Manager):
+    """Client manager for app.py's Flask-SocketIO server, which has no clients
+    in this mode: every emit, from any thread, is re-issued on `sio`."""
+
+    loop: asyncio.AbstractEventLoop | None = None
+
+    def emit(self, event, data, namespace, room=None, skip_sid=None, callback=None, to=None, **kwargs):
+        if self.loop is None or self.loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(
+            sio.emit(event, data, to=to or room, skip_sid=skip_sid, namespace=namespace), self.loop
+        )
+
+bridge = None
+if not backend.REDIS_URL:  # with Redis, app.py's emits already arrive through the queue
+    bridge = LoopBridgeManager()
+    bridge.set_server(backend.socketio.server)
+    backend.socketio.server.manager = bridge
+    backend.socketio.server.manager_initialized = True
+
+vapi = AsyncVapiClient(
+    backend.API_URL,
+    backend.VAPI_KEY,
+    max_retries=backend.vapi.max_retries,
+    pool_size=int(os.getenv("VAPI_POOL_SIZE", "100")),
+    breaker=backend.vapi.breaker,
+    on_request=telemetry.observe_vapi,
+)
+supabase = None  # AsyncClient, created on startup inside the event loop
+background_tasks: set[asyncio.Task] = set()
+
+
+def spawn(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+
+async def off_loop(fn, *args, **kwargs):
+    """Call app.py's active-call store or teacher_events from the loop. Both
+    are Redis round trips when REDIS_URL is set, so they run in a thread then;
+    the in-process versions are cheap enough to call inline."""
+    if backend.REDIS_URL:
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    return fn(*args, **kwargs)
+
+
+async def startup():
+    global supabase
+    supabase = await acreate_client(backend.SUPABASE_URL, backend.SUPABASE_SERVICE_KEY)
+    if bridge is not None:
+        bridge.loop = asyncio.get_running_loop()
+
+
+async def shutdown():
+    await vapi.aclose()
+
+
+class Request:
+    def __init__(self, scope: dict, body: bytes, params: dict):
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]}
+        self.args = {k: v[0] for k, v in parse_qs(scope["query_string"].decode("latin-1")).items()}
+        self.body = body
+        self.params = params
+
+    def json(self):
+        try:
+            return json.loads(self.body or b"null")
+        except ValueError:
+            return None
+
+
+class Response:
+    """JSON response serialised like Flask's jsonify, so ETags match across modes."""
+
+    def __init__(self, payload=None, status: int = 200, *, body: bytes | None = None):
+        if body is None:
+            body = (json.dumps(payload, sort_keys=True, separators=(",", ":")) + "\n").encode()
+        self.body = body
+        self.status = status
+        self.headers = {
+            "Content-Type": "application/json",
+            "Access-Control-Allow-Origin": "*",
+            "Vary": "Accept-Encoding",
+        }
+
+    def finalize(self, request: Request):
+        """Apply conditional (304) handling and compression, as app.py's hooks do."""
+        etag = self.headers.get("ETag")
+        if self.status == 200 and etag:
+            if_none_match = request.headers.get("if-none-match")
+            if if_none_match is not None:
+                tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+                not_modified = "*" in tags or etag in tags
+            else:
+                not_modified = modified_since(request.headers.get("if-modified-since"), self.headers.get("Last-Modified"))
+            if not_modified:
+                self.status, self.body = 304, b""
+                return
+        encoding = compression.negotiate(request.headers.get("accept-encoding"))
+        if self.status == 200 and encoding and len(self.body) >= backend.COMPRESSION["min_size"]:
+            self.body = compression.compress(
+                self.body, encoding,
+                gzip_level=backend.COMPRESSION["gzip_level"],
+                brotli_quality=backend.COMPRESSION["brotli_quality"],
+            )
+            self.headers["Content-Encoding"] = encoding
+            if etag:
+                self.headers["ETag"] = f"W/{etag}"
+
+    async def send(self, send):
+        headers = [(k.lower().encode(), v.encode()) for k, v in self.headers.items()]
+        headers.append((b"content-length", str(len(self.body)).encode()))
+        await send({"type": "http.response.start", "status": self.status, "headers": headers})
+        await send({"type": "http.response.body", "body": self.body})
+
+
+def modified_since(header: str | None, last_modified: str | None) -> bool:
+    if not header or not last_modified:
+        return False
+    try:
+        return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+
+
+def conditional_json(payload, last_modified: float | None = None) -> Response:
+    response = Response(payload)
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.headers["ETag"] = f'"{hashlib.sha1(response.body).hexdigest()}"'
+    if last_modified is not None:
+        response.headers["Last-Modified"] = formatdate(int(last_modified), usegmt=True)
+    return response
+
+
+class Router:
+    """Serves the routes registered with `route`; anything else (including
+    their OPTIONS preflights) goes to `fallback`, the Flask app."""
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+        self.routes: list[tuple[str, str, re.Pattern, object]] = []
+
+    def route(self, rule: str, method: str):
+        pattern = re.compile("^" + re.sub(r"<(\w+)>", r"(?P<\1>[^/]+)", rule) + "$")
+
+        def register(handler):
+            self.routes.append((method, rule, pattern, handler))
+            return handler
+        return register
+
+    def match(self, method: str, path: str):
+        for route_method, rule, pattern, handler in self.routes:
+            found = pattern.match(path) if route_method == method else None
+            if found:
+                return rule, handler, found.groupdict()
+        return None, None, None
+
+    async def __call__(self, scope, receive, send):
+        rule, handler, params = self.match(scope.get("method"), scope.get("path", "")) if scope["type"] == "http" else (None, None, None)
+        if handler is None:
+            return await self.fallback(scope, receive, send)
+
+        started = time.perf_counter()
+        body, more = b"", True
+        while more:
+            message = await receive()
+            body += message.get("body", b"")
+            more = message.get("more_body", False)
+        request = Request(scope, body, params)
+        response = await handler(request)
+        response.finalize(request)
+        await response.send(send)
+        telemetry.http_latency.labels(rule, request.method, str(response.status)).observe(time.perf_counter() - started)
+
+
+router = Router(WSGIMiddleware(backend.app, workers=int(os.getenv("WSGI_THREADS", "32"))))
+
+
+async def current_teacher(request: Request) -> str:
+    token = request.headers.get("authorization", "").replace("Bearer ", "").strip()
+    try:
+        if not token:
+            raise PermissionError("Missing bearer token")
+        return await asyncio.to_thread(backend.token_verifier.verify, token)
+    except Exception as e:
+        logger.warning(f"Auth failed: {e}")
+        raise PermissionError("Authentication failed")
+
+
+_loading: dict[tuple[int, str], asyncio.Future] = {}
+
+async def cached(cache, key: str, loader):
+    """Async read-through for app.py's TTLCaches; concurrent misses share one load."""
+    value = cache.get(key)
+    if value is not None:
+        return value
+    slot = (id(cache), key)
+    task = _loading.get(slot)
+    if task is None:
+        task = _loading[slot] = asyncio.ensure_future(loader())
+        task.add_done_callback(lambda _: _loading.pop(slot, None))
+    value = await asyncio.shield(task)
+    cache.set(key, value)
+    return value
+
+
+async def assistant_ids_for(teacher_id: str) -> list[str]:
+    async def load():
+        rows = await adb_exec(
+            supabase.table("assistants").select("id").eq("teacher_id", teacher_id),
+            context="get assistant ids for teacher"
+        )
+        return [a["id"] for a in rows]
+    return await cached(backend.teacher_assistant_ids, teacher_id, load)
+
+
+async def cached_teacher_assistants(teacher_id: str) -> dict:
+    async def load():
+        assistants = await adb_exec(
+            supabase.table("assistants")
+            .select("id, vapi_id, assistant_name, system_prompt, first_message, description")
+            .eq("teacher_id", teacher_id)
+            .order("created_at", desc=True),
+            context="teacher assistants"
+        )
+        return {"assistants": assistants, "modified": time.time()}
+    return await cached(backend.teacher_assistant_listings, teacher_id, load)
+
+
+async def teacher_for_student_key(student_key: str) -> str:
+    async def load():
+        teacher_row = await supabase.table("teachers").select("id").eq("student_key", student_key).maybe_single().execute()
+        if not teacher_row or not teacher_row.data:
+            raise LookupError("Unknown student key")
+        return teacher_row.data["id"]
+    return await cached(backend.student_key_teachers, student_key, load)
+
+
+async def watch_call_monitor(call_id: str, *, retries: int = 12, delay: float = 0.5, max_delay: float = 8.0):
+    """Resolve a call's monitor URLs without holding a thread, then hand off to app.py."""
+    try:
+        for _ in range(retries):
+            monitor = (await vapi.get_call(call_id)).get("monitor", {})
+            if monitor.get("listenUrl") and monitor.get("controlUrl"):
+                break
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_delay)
+        else:
+            raise RuntimeError("monitor URLs not ready in time")
+    except Exception as exc:
+        logger.warning(f"Monitor URLs unavailable for call {call_id}: {exc}")
+        return
+    backend.publish_monitor_urls(call_id, monitor["listenUrl"], monitor["controlUrl"])
+
+
+@router.route("/start-call", "POST")
+async def start_phone_call(request: Request) -> Response:
+    try:
+        body = request.json() or {}
+        vapi_assistant_id = body.get("assistantId")
+        student_name = body.get("studentName")
+        student_number = body.get("studentNumber")
+        if not all([vapi_assistant_id, student_name, student_number]):
+            return Response({"error": "assistantId, studentName, studentNumber are required"}, 400)
+
+        assistant_row = await adb_exec(
+            supabase.table("assistants")
+            .select("id, teacher_id")
+            .eq("vapi_id", vapi_assistant_id)
+            .single(),
+            context="lookup assistant by vapi_id"
+        )
+        call_id = (await vapi.create_call({
+            "phoneNumberId": backend.PHONE_ID,
+            "assistantId": vapi_assistant_id,
+            "customer": {"name": student_name, "number": student_number},
+        }))["id"]
+        call_info = await off_loop(
+            backend.register_active_call,
+            call_id, student_name, vapi_assistant_id=vapi_assistant_id, teacher_id=assistant_row["teacher_id"]
+        )
+
+        try:
+            await supabase.table("calls").insert({
+                "id": call_id,
+                "assistant_id": assistant_row["id"],
+                "student_name": student_name,
+            }).execute()
+        except Exception as db_error:
+            logger.warning(f"Failed to save call to database: {db_error}")
+
+        await off_loop(backend.teacher_events.emit, "new_call", call_info, backend.teacher_room(assistant_row["teacher_id"]))
+        spawn(watch_call_monitor(call_id))
+        return Response({"success": True, "callId": call_id}, 201)
+
+    except Exception as exc:
+        logger.exception("Error starting call")
+        return Response({"error": str(exc)}, 500)
+
+
+async def teacher_for_call(call_id: str, info: dict) -> str | None:
+    teacher_id = backend.known_call_teacher(call_id, info)
+    if teacher_id:
+        return teacher_id
+    rows = await adb_exec(backend.call_teacher_query(call_id, client=supabase), context="lookup teacher for call")
+    return (rows[0].get("assistant") or {}).get("teacher_id") if rows else None
+
+
+async def handle_vapi_event(evt: dict):
+    """app.py's handle_vapi_event with the teacher lookup on the async client.
+    Ending a call (stream teardown) and the sqlite journal/search-index writes
+    have no async counterpart, so only those steps run in a thread."""
+    msg = evt.get("message", {})
+    call_id = msg.get("call", {}).get("id")
+
+    if msg.get("type") == "status-update":
+        if call_id and msg.get("status") in backend.ENDED_STATUSES:
+            await asyncio.to_thread(backend.end_active_call, call_id)
+
+    elif msg.get("type") == "end-of-call-report" and call_id:
+        info = await off_loop(backend.active_calls.get, call_id) or backend.recently_ended_calls.get(call_id) or {}
+        raw_duration = backend.report_duration(msg, info)
+
+        teacher_id = await teacher_for_call(call_id, info)
+        if teacher_id:
+            await off_loop(backend.teacher_events.emit, "call_report",
+                           backend.call_report_event(call_id, info, msg), backend.teacher_room(teacher_id))
+
+        await asyncio.to_thread(backend.persist_call_report, call_id, teacher_id, info, msg, raw_duration)
+        await asyncio.to_thread(backend.end_active_call, call_id)
+
+
+@router.route("/vapi-webhook", "POST")
+async def vapi_webhook(request: Request) -> Response:
+    try:
+        await handle_vapi_event(request.json() or {})
+    except Exception:
+        logger.exception("Webhook error")
+    response = Response(body=b"")
+    response.headers["Content-Type"] = "text/html; charset=utf-8"
+    return response
+
+
+@router.route("/teacher-calls", "GET")
+async def get_teacher_calls(request: Request) -> Response:
+    try:
+        teacher_id = await current_teacher(request)
+
+        try:
+            limit = min(max(int(request.args.get("limit", backend.CALLS_PAGE_DEFAULT)), 1), backend.CALLS_PAGE_MAX)
+            projection = backend.call_projection(request.args.get("fields"))
+            cursor = backend.decode_cursor(request.args["cursor"]) if request.args.get("cursor") else None
+            archived = backend.archived_param(request.args.get("archived"))
+        except ValueError as bad_param:
+            return Response({"error": str(bad_param)}, 400)
+
+        if not await assistant_ids_for(teacher_id):
+            return conditional_json({"calls": [], "nextCursor": None})
+
+        call_rows = await adb_exec(
+            backend.teacher_calls_query(teacher_id, projection, cursor=cursor, limit=limit + 1,
+                                        client=supabase, archived=archived),
+            context="get teacher calls"
+        )
+        next_cursor = backend.encode_cursor(call_rows[limit - 1]) if len(call_rows) > limit else None
+        return conditional_json({"calls": call_rows[:limit], "nextCursor": next_cursor})
+
+    except Exception as e:
+        logger.exception("Failed to fetch teacher calls")
+        return Response({"error": str(e)}, 500)
+
+
+@router.route("/teacher/assistants", "GET")
+async def list_teacher_assistants(request: Request) -> Response:
+    try:
+        teacher_id = await current_teacher(request)
+        listing = await cached_teacher_assistants(teacher_id)
+        return conditional_json(listing["assistants"], listing["modified"])
+
+    except Exception as exc:
+        logger.exception("Failed to fetch teacher assistants")
+        return Response({"error": str(exc)}, 500)
+
+
+@router.route("/assistants/by-key/<student_key>", "GET")
+async def assistants_for_student(request: Request) -> Response:
+    try:
+        teacher_id = await teacher_for_student_key(request.params["student_key"])
+        listing = await cached_teacher_assistants(teacher_id)
+        assistants = [
+            {k: a[k] for k in ("id", "vapi_id", "assistant_name")}
+            for a in listing["assistants"]
+        ]
+        return conditional_json(assistants, listing["modified"])
+
+    except Exception:
+        logger.exception("Failed to fetch assistants for student")
+        return Response({"error": "Invalid student key or no assistants found"}, 404)
+
+
+@router.route("/active-calls", "GET")
+async def get_active_calls(request: Request) -> Response:
+    try:
+        teacher_id = await current_teacher(request)
+    except PermissionError as exc:
+        return Response({"error": str(exc)}, 401)
+    calls = await off_loop(backend.active_calls.values)
+    return Response([c for c in calls if c.get("teacherId") == teacher_id])
+
+
+async def teacher_session(sid: str) -> str | None:
+    return (await sio.get_session(sid, namespace="/teacher")).get("teacherId")
+
+
+async def owned_call(call_id: str | None, teacher_id: str | None) -> dict | None:
+    info = await off_loop(backend.active_calls.get, call_id) if call_id else None
+    return info if info and info.get("teacherId") == teacher_id else None
+
+
+@sio.on("connect", namespace="/teacher")
+async def teacher_connect(sid, environ, auth=None):
+    token = (auth or {}).get("token") or parse_qs(environ.get("QUERY_STRING", "")).get("token", [None])[0]
+    try:
+        if not token:
+            raise PermissionError("Missing token")
+        teacher_id = await asyncio.to_thread(backend.token_verifier.verify, token)
+    except Exception as e:
+        logger.warning(f"Teacher socket auth failed: {e}")
+        raise socketio.exceptions.ConnectionRefusedError("unauthorized")
+
+    variant, snapshot = await off_loop(backend.teacher_socket_snapshot, teacher_id, auth)
+    await sio.save_session(sid, {"teacherId": teacher_id, "variant": variant}, namespace="/teacher")
+    await sio.enter_room(sid, backend.teacher_room(teacher_id), namespace="/teacher")
+    await sio.enter_room(sid, variant, namespace="/teacher")
+    await off_loop(backend.variant_members.join, variant)
+    telemetry.socket_connections.labels("/teacher").inc()
+    await sio.emit("active_calls", snapshot, to=sid, namespace="/teacher")
+
+
+@sio.on("disconnect", namespace="/teacher")
+async def teacher_disconnect(sid, *args):
+    telemetry.socket_connections.labels("/teacher").dec()
+    variant = (await sio.get_session(sid, namespace="/teacher")).get("variant")
+    if variant:
+        await off_loop(backend.variant_members.leave, variant)
+    backend.audio_fanout.remove_listener(sid)
+
+
+@sio.on("listen_start", namespace="/teacher")
+async def handle_listen_start(sid, data):
+    call_id = (data or {}).get("callId")
+    info = await owned_call(call_id, await teacher_session(sid))
+    if not info:
+        return {"error": "Unknown call"}
+    if not info.get("listenUrl"):
+        return {"error": "Call audio not ready yet"}
+    return {"callId": call_id, **backend.audio_fanout.subscribe(call_id, info["listenUrl"], sid)}
+
+
+@sio.on("listen_stop", namespace="/teacher")
+async def handle_listen_stop(sid, data):
+    call_id = (data or {}).get("callId")
+    if call_id:
+        backend.audio_fanout.unsubscribe(call_id, sid)
+
+
+@sio.on("transcript_history", namespace="/teacher")
+async def handle_transcript_history(sid, data):
+    call_id = (data or {}).get("callId")
+    if not await owned_call(call_id, await teacher_session(sid)):
+        return {"error": "Unknown call"}
+    segments = backend.transcript_relay.history(call_id) if backend.transcript_relay else []
+    return {"callId": call_id, "segments": segments}
+
+
+@sio.on("connect")
+async def default_connect(sid, environ, auth=None):
+    telemetry.socket_connections.labels("/").inc()
+
+
+@sio.on("disconnect")
+async def default_disconnect(sid, *args):
+    telemetry.socket_connections.labels("/").dec()
+
+
+@sio.on("live_message")
+async def handle_live_message(sid, data):
+    try:
+        call_id = data.get("callId")
+        message = data.get("message")
+
+        if not call_id or not message:
+            return {"error": "Missing callId or message"}
+
+        message_id = backend.control_pipeline.enqueue(call_id, "message", {"content": message}, ("/", sid))
+        return {"success": True, "messageId": message_id}
+    except Exception as e:
+        logger.exception("Error in live_message handler")
+        return {"error": str(e)}
+
+
+@sio.on("join_call")
+async def handle_join_call(sid, data):
+    call_id = data.get("callId")
+    if call_id:
+        await sio.enter_room(sid, call_id)
+        logger.info(f"Client joined call room: {call_id}")
+
+
+asgi_app = socketio.ASGIApp(sio, other_asgi_app=router, on_startup=startup, on_shutdown=shutdown)
+
+
+def main():
+    uvicorn.run(
+        asgi_app,
+        host="0.0.0.0",
+        port=int(os.getenv("PORT", "5000")),
+        log_level="debug" if os.getenv("FLASK_DEBUG", "1") != "0" else "info",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import asyncio, logging, random, time
+
+import httpx
+
+from vapi_client import CircuitBreaker, CircuitOpenError, VapiClient
+import telemetry
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncVapiClient:
+    """asyncio counterpart of VapiClient for the calls the async server makes
+    itself (POST /call and GET /call/{id}).
+
+    One pooled `httpx.AsyncClient`, the same per-endpoint timeouts and the
+    same retry policy: 429 is retried for any method, 5xx and connection
+    errors only for idempotent ones. Pass the sync client's breaker so both
+    stop calling a degraded Vapi together.
+    """
+
+    TIMEOUTS = VapiClient.TIMEOUTS
+    RETRY_STATUSES = VapiClient.RETRY_STATUSES
+    IDEMPOTENT_METHODS = VapiClient.IDEMPOTENT_METHODS
+
+    def __init__(self, base_url: str, api_key: str, *, max_retries: int = 3,
+                 backoff: float = 0.5, max_backoff: float = 8.0, pool_size: int = 100,
+                 breaker: CircuitBreaker | None = None, on_request=None):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+        # Called as on_request(endpoint, method, status, seconds) after every attempt
+        self.on_request = on_request
+        self.client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            headers={"Authorization": f"Bearer {api_key}"},
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    def _observe(self, endpoint: str, method: str, status, started: float):
+        if self.on_request is not None:
+            try:
+                self.on_request(endpoint, method, status, time.perf_counter() - started)
+            except Exception:
+                pass
+
+    async def _sleep_before_retry(self, attempt: int, resp: httpx.Response | None):
+        retry_after = resp.headers.get("Retry-After") if resp is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = min(float(retry_after), self.max_backoff)
+        else:
+            delay = random.uniform(0, min(self.backoff * (2 ** attempt), self.max_backoff))
+        await asyncio.sleep(delay)
+
+    async def request(self, method: str, path: str, *, endpoint: str, retries: int | None = None,
+                      **kwargs) -> httpx.Response:
+        """Send a request, retrying per the class policy. Returns the final
+        response without calling `raise_for_status()`."""
+        method = method.upper()
+        retries = self.max_retries if retries is None else retries
+        kwargs.setdefault("timeout", self.TIMEOUTS.get(endpoint, 15))
+
+        idempotent = method in self.IDEMPOTENT_METHODS
+        for attempt in range(retries + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"Vapi circuit open; skipping {method} {endpoint}")
+
+            resp = None
+            started = time.perf_counter()
+            try:
+                resp = await self.client.request(method, path, **kwargs)
+            except httpx.TransportError:
+                self._observe(endpoint, method, "error", started)
+                self.breaker.record_failure()
+                if not idempotent or attempt == retries:
+                    raise
+                await self._sleep_before_retry(attempt, None)
+                continue
+            except BaseException:
+                # Anything else, cancellation included, still has to release a half-open trial
+                self._observe(endpoint, method, "error", started)
+                self.breaker.record_failure()
+                raise
+
+            self._observe(endpoint, method, resp.status_code, started)
+            if resp.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+
+            retryable = resp.status_code == 429 or (idempotent and resp.status_code in self.RETRY_STATUSES)
+            if not retryable or attempt == retries:
+                return resp
+            await self._sleep_before_retry(attempt, resp)
+        return resp
+
+    async def _json(self, method: str, path: str, *, endpoint: str, **kwargs) -> dict:
+        r = await self.request(method, path, endpoint=endpoint, **kwargs)
+        r.raise_for_status()
+        return r.json()
+
+    async def create_call(self, payload: dict) -> dict:
+        return await self._json("POST", "/call", endpoint="call", json=payload)
+
+    async def get_call(self, call_id: str) -> dict:
+        return await self._json("GET", f"/call/{call_id}", endpoint="call_status")
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+async def adb_exec(query, *, context: str = ""):
+    """`db_exec` for supabase's async client: await the query, raise on error, return payload."""
+    started = time.perf_counter()
+    try:
+        res = await query.execute()
+    except Exception:
+        telemetry.observe_db(context, time.perf_counter() - started, ok=False)
+        raise
+    telemetry.observe_db(context, time.perf_counter() - started, ok=True)
+    api_error = getattr(res, "error", None)
+    if api_error:
+        logger.error(f"Supabase {context} error → {api_error}")
+        raise RuntimeError(api_error)
+    return res.data
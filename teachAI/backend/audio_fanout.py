@@ -0,0 +1,176 @@
+import logging, threading
+from collections import deque
+
+import websocket
+
+try:
+    import numpy as np
+except ImportError:  # downmix/resample are optional; audio is passed through untouched
+    np = None
+
+
+def convert_pcm(pcm: bytes, *, channels: int, src_rate: int, dst_rate: int, mono: bool) -> bytes:
+    """Downmix interleaved 16-bit PCM to mono and/or linearly resample it."""
+    samples = np.frombuffer(pcm[: len(pcm) - len(pcm) % (2 * channels)], dtype="<i2")
+    frames = samples.reshape(-1, channels).astype(np.float32)
+    if mono and channels > 1:
+        frames = frames.mean(axis=1, keepdims=True)
+    if dst_rate != src_rate and len(frames) > 1:
+        n_out = max(1, round(len(frames) * dst_rate / src_rate))
+        src_pos = np.arange(len(frames), dtype=np.float32)
+        dst_pos = np.linspace(0, len(frames) - 1, n_out, dtype=np.float32)
+        frames = np.stack([np.interp(dst_pos, src_pos, frames[:, c]) for c in range(frames.shape[1])], axis=1)
+    return np.clip(np.rint(frames), -32768, 32767).astype("<i2").tobytes()
+
+
+class _Upstream:
+    def __init__(self, call_id: str, listen_url: str, buffer_chunks: int):
+        self.call_id = call_id
+        self.listen_url = listen_url
+        self.buffer_chunks = buffer_chunks
+        self.listeners: dict[str, deque] = {}
+        self.sinks = {}
+        self.lock = threading.Lock()
+        self.running = True
+        self.ws = None
+
+    def idle(self) -> bool:
+        return not self.listeners and not self.sinks
+
+
+class AudioFanout:
+    """Share one `listenUrl` websocket per call between every consumer.
+
+    Teacher listeners each get a bounded ring buffer of converted audio that
+    a flusher drains every `flush_interval`; a listener that falls behind
+    loses its oldest chunks rather than growing memory. Sinks (e.g. the
+    transcription relay) receive the raw upstream frames synchronously on
+    the pump, so they must only enqueue; a sink that blocks stalls every
+    listener of the call. The
+    upstream connection closes once the last listener and sink are gone.
+    """
+
+    def __init__(self, emit_audio, spawn, sleep, *, connect=websocket.create_connection,
+                 source_rate: int = 16000, source_channels: int = 2, target_rate: int | None = None,
+                 mono: bool = False, buffer_chunks: int = 50, flush_interval: float = 0.1, logger=None):
+        self.emit_audio = emit_audio
+        self.spawn = spawn
+        self.sleep = sleep
+        self.connect = connect
+        self.source_rate = source_rate
+        self.source_channels = source_channels
+        self.buffer_chunks = buffer_chunks
+        self.flush_interval = flush_interval
+        self.logger = logger or logging.getLogger(__name__)
+
+        # Without numpy the stream can only be passed through as-is
+        converting = np is not None and (mono or (target_rate or source_rate) != source_rate)
+        self.mono = mono if converting else False
+        self.target_rate = (target_rate or source_rate) if converting else source_rate
+        self.converting = converting
+        self._calls: dict[str, _Upstream] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def output_format(self) -> dict:
+        return {
+            "encoding": "pcm_s16le",
+            "sampleRate": self.target_rate,
+            "channels": 1 if self.mono else self.source_channels,
+        }
+
+    def _upstream(self, call_id: str, listen_url: str) -> _Upstream:
+        with self._lock:
+            up = self._calls.get(call_id)
+            if up is None:
+                up = self._calls[call_id] = _Upstream(call_id, listen_url, self.buffer_chunks)
+                self.spawn(self._pump, up)
+                self.spawn(self._flush_loop, up)
+            return up
+
+    def subscribe(self, call_id: str, listen_url: str, listener_id: str) -> dict:
+        up = self._upstream(call_id, listen_url)
+        with up.lock:
+            up.listeners.setdefault(listener_id, deque(maxlen=self.buffer_chunks))
+        return self.output_format
+
+    def add_sink(self, call_id: str, listen_url: str, name: str, fn):
+        up = self._upstream(call_id, listen_url)
+        with up.lock:
+            up.sinks[name] = fn
+
+    def unsubscribe(self, call_id: str, listener_id: str):
+        up = self._calls.get(call_id)
+        if up is None:
+            return
+        with up.lock:
+            up.listeners.pop(listener_id, None)
+            idle = up.idle()
+        if idle:
+            self.stop(call_id)
+
+    def remove_listener(self, listener_id: str):
+        for call_id in list(self._calls):
+            self.unsubscribe(call_id, listener_id)
+
+    def listener_count(self) -> int:
+        return sum(len(up.listeners) for up in list(self._calls.values()))
+
+    def stop(self, call_id: str):
+        with self._lock:
+            up = self._calls.pop(call_id, None)
+        if up is not None:
+            self._close(up)
+
+    def _close(self, up: _Upstream):
+        with self._lock:
+            # Only unregister this upstream, not a newer one for the same call
+            if self._calls.get(up.call_id) is up:
+                del self._calls[up.call_id]
+        up.running = False
+        if up.ws is not None:
+            try:
+                up.ws.close()
+            except Exception:
+                pass
+
+    def _pump(self, up: _Upstream):
+        try:
+            up.ws = self.connect(up.listen_url)
+            while up.running:
+                frame = up.ws.recv()
+                if not frame:
+                    break
+                if not isinstance(frame, bytes):
+                    continue
+                with up.lock:
+                    sinks = list(up.sinks.values())
+                    buffers = list(up.listeners.values())
+                for sink in sinks:
+                    try:
+                        sink(frame)
+                    except Exception:
+                        self.logger.exception(f"Audio sink for {up.call_id} failed")
+                if buffers:
+                    chunk = convert_pcm(frame, channels=self.source_channels, src_rate=self.source_rate,
+                                        dst_rate=self.target_rate, mono=self.mono) if self.converting else frame
+                    for buf in buffers:
+                        buf.append(chunk)
+        except Exception as exc:
+            if up.running:
+                self.logger.warning(f"Listen stream for {up.call_id} ended: {exc}")
+        finally:
+            self._close(up)
+
+    def _flush_loop(self, up: _Upstream):
+        while True:
+            self.sleep(self.flush_interval)
+            stopping = not up.running
+            with up.lock:
+                pending = [(lid, b"".join(buf)) for lid, buf in up.listeners.items() if buf]
+                for buf in up.listeners.values():
+                    buf.clear()
+            for listener_id, data in pending:
+                self.emit_audio(listener_id, up.call_id, data)
+            if stopping:
+                return
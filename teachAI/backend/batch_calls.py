@@ -0,0 +1,114 @@
+import logging, queue, threading, time, uuid
+
+
+class TokenBucket:
+    """Allow `rate` acquisitions per second on average, with bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float, sleep=time.sleep, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.sleep = sleep
+        self.clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> float:
+        """Take a token and return 0, or return how long to wait for the next one."""
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        while (wait := self.try_acquire()) > 0:
+            self.sleep(wait)
+
+
+class CallBatch:
+    def __init__(self, teacher_id: str, assistant_id: str, students: list[dict]):
+        self.id = uuid.uuid4().hex
+        self.teacher_id = teacher_id
+        self.assistant_id = assistant_id
+        self.created_at = time.time()
+        self.students = [
+            {"studentName": s["studentName"], "status": "queued", "callId": None, "error": None}
+            for s in students
+        ]
+        self.lock = threading.Lock()
+
+    @property
+    def completed(self) -> int:
+        return sum(1 for s in self.students if s["status"] in ("started", "failed"))
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            total, completed = len(self.students), self.completed
+            return {
+                "batchId": self.id,
+                "assistantId": self.assistant_id,
+                "createdAt": self.created_at,
+                "status": "done" if completed == total else "running",
+                "total": total,
+                "completed": completed,
+                "failed": sum(1 for s in self.students if s["status"] == "failed"),
+                "students": [dict(s) for s in self.students],
+            }
+
+
+class BatchCallLauncher:
+    """Start calls for a whole roster through a fixed pool of workers.
+
+    Every batch's students go onto one shared queue, so the number of calls
+    being placed at once is bounded by `workers` no matter how many batches
+    are running, and a token bucket keeps the start rate under Vapi's quota.
+    Each finished student is reported through `on_progress(batch, index)`.
+    """
+
+    def __init__(self, launch, on_progress, *, workers: int = 4, rate: float = 2.0, burst: int = 5,
+                 sleep=time.sleep, logger=None):
+        self.launch = launch
+        self.on_progress = on_progress
+        self.workers = workers
+        self.bucket = TokenBucket(rate, burst, sleep=sleep)
+        self.logger = logger or logging.getLogger(__name__)
+        self._jobs: queue.Queue = queue.Queue()
+        self._started = False
+
+    def start(self, spawn):
+        """Start the worker pool with `spawn(fn, *args)`, e.g. socketio.start_background_task."""
+        if self._started:
+            return
+        self._started = True
+        for _ in range(self.workers):
+            spawn(self._work)
+
+    def submit(self, batch: CallBatch, students: list[dict], context: dict) -> CallBatch:
+        """Queue one launch per student; `context` is passed through to `launch`."""
+        for index, student in enumerate(students):
+            self._jobs.put((batch, index, student, context))
+        return batch
+
+    def pending(self) -> int:
+        return self._jobs.qsize()
+
+    def _work(self):
+        while True:
+            batch, index, student, context = self._jobs.get()
+            self.bucket.acquire()
+            try:
+                call_id = self.launch(student["studentName"], student["studentNumber"], **context)
+                result = {"status": "started", "callId": call_id}
+            except Exception as exc:
+                self.logger.warning(f"Batch {batch.id} failed to call {student['studentName']}: {exc}")
+                result = {"status": "failed", "error": str(exc)}
+            with batch.lock:
+                batch.students[index].update(result)
+            try:
+                self.on_progress(batch, index)
+            except Exception:
+                self.logger.exception(f"Batch {batch.id} progress report failed")
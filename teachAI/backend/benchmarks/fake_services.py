@@ -0,0 +1,267 @@
+"""Local stand-ins for the Vapi REST API and Supabase's PostgREST, good
+enough for the queries app.py makes. Both add a fixed latency to every
+request and fail a configurable fraction of them with a 5xx."""
+
+import json, random, threading, time, uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+
+class FaultyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+    failure_rate = 0.0
+
+    def log_message(self, *args):
+        pass
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        if "json" not in (self.headers.get("Content-Type") or ""):
+            return raw
+        return json.loads(raw or b"null")
+
+    def _send(self, status: int, payload=None):
+        data = b"" if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _handle(self):
+        if self.latency:
+            time.sleep(self.latency)
+        body = self._body()
+        if self.failure_rate and random.random() < self.failure_rate:
+            return self._send(503, {"message": "injected failure"})
+        status, payload = self.route(self.command, urlsplit(self.path), body)
+        self._send(status, payload)
+
+    do_GET = do_POST = do_PATCH = do_DELETE = do_PUT = _handle
+
+    def route(self, method, url, body):
+        return 404, {"message": "not found"}
+
+
+class VapiHandler(FaultyHandler):
+    calls: dict = {}
+
+    def route(self, method, url, body):
+        parts = [p for p in url.path.split("/") if p]
+        host = self.headers.get("Host")
+        if method == "POST" and parts == ["call"]:
+            call_id = str(uuid.uuid4())
+            self.calls[call_id] = {"id": call_id, "status": "in-progress"}
+            return 201, self.calls[call_id]
+        if method == "GET" and parts == ["call"]:
+            return 200, list(self.calls.values())
+        if method == "GET" and len(parts) == 2 and parts[0] == "call":
+            return 200, {
+                "id": parts[1],
+                "status": self.calls.get(parts[1], {}).get("status", "ended"),
+                "monitor": {
+                    "listenUrl": f"ws://{host}/listen/{parts[1]}",
+                    "controlUrl": f"http://{host}/control/{parts[1]}",
+                },
+            }
+        if method == "POST" and parts[:1] == ["control"]:
+            return 200, {"ok": True}
+        if method == "POST" and parts == ["assistant"]:
+            return 201, {"id": str(uuid.uuid4())}
+        if method == "DELETE" and parts[:1] == ["assistant"]:
+            return 200, {}
+        if method == "POST" and parts == ["file"]:
+            return 201, {"id": str(uuid.uuid4())}
+        return 404, {"message": "not found"}
+
+
+def _lookup(row: dict, column: str):
+    for key in column.split("."):
+        row = row.get(key) if isinstance(row, dict) else None
+    return row
+
+
+OPERATORS = {"eq", "neq", "in", "is", "gt", "lt", "gte", "lte"}
+
+
+def _unquote(value: str) -> str:
+    return value[1:-1] if len(value) >= 2 and value[0] == value[-1] == '"' else value
+
+
+def _split_top(text: str) -> list[str]:
+    """Split a logic-tree body on the commas that aren't inside parens or quotes."""
+    parts, depth, quoted, start = [], 0, False, 0
+    for i, ch in enumerate(text):
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and ch == ",":
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return [p for p in parts if p]
+
+
+def _matches(row: dict, column: str, expr: str) -> bool:
+    """One PostgREST filter, `not.` prefix included. Raises ValueError on
+    operators this fake doesn't implement rather than letting every row through."""
+    if column in {"or", "and"}:
+        return _logic(row, column, expr)
+    op, _, value = expr.partition(".")
+    if op == "not":
+        return not _matches(row, column, value)
+    if op not in OPERATORS:
+        raise ValueError(f"unsupported filter {column}={expr}")
+    actual = _lookup(row, column)
+    value = _unquote(value)
+    if op in {"eq", "neq"}:
+        equal = str(actual).lower() == value.lower() if isinstance(actual, bool) else str(actual) == value
+        return equal == (op == "eq")
+    if op == "in":
+        return str(actual) in [_unquote(v) for v in _split_top(value.strip("()"))]
+    if op == "is":
+        return actual is None if value == "null" else str(actual).lower() == value
+    if actual is None:
+        return False
+    return {"gt": str.__gt__, "lt": str.__lt__, "gte": str.__ge__, "lte": str.__le__}[op](str(actual), value)
+
+
+def _logic(row: dict, kind: str, body: str) -> bool:
+    """`or=(...)` / `and=(...)`: conditions are `column.op.value` or nested
+    `and(...)` / `or(...)`, each optionally prefixed with `not.`."""
+    if not (body.startswith("(") and body.endswith(")")):
+        raise ValueError(f"malformed {kind} filter {body}")
+    results = []
+    for condition in _split_top(body[1:-1]):
+        negate = condition.startswith("not.")
+        if negate:
+            condition = condition[4:]
+        nested = condition.partition("(")[0]
+        if nested in {"or", "and"}:
+            result = _logic(row, nested, condition[len(nested):])
+        else:
+            parts = condition.split(".")
+            at = next((i for i, part in enumerate(parts) if i and (part in OPERATORS or part == "not")), None)
+            if at is None:
+                raise ValueError(f"malformed {kind} condition {condition}")
+            result = _matches(row, ".".join(parts[:at]), ".".join(parts[at:]))
+        results.append(result != negate)
+    return any(results) if kind == "or" else all(results)
+
+
+def _sort(rows: list[dict], order: str) -> list[dict]:
+    """PostgREST ordering: `column[.asc|.desc][.nullsfirst|.nullslast]`, nulls
+    last ascending and first descending unless the clause says otherwise."""
+    for clause in reversed(order.split(",")):
+        if not clause:
+            continue
+        column, *modifiers = clause.split(".")
+        desc = "desc" in modifiers
+        nulls_last = "nullslast" in modifiers or ("nullsfirst" not in modifiers and not desc)
+        null_high = nulls_last != desc  # where nulls sit before `reverse` is applied
+        rows.sort(key=lambda r: ((_lookup(r, column) is None) == null_high, str(_lookup(r, column) or "")),
+                  reverse=desc)
+    return rows
+
+
+class SupabaseHandler(FaultyHandler):
+    """In-memory PostgREST: eq/neq/in/is/gt/lt/gte/lte filters with `not.` and
+    `or=`/`and=` logic trees (dotted columns reach into embedded rows), order
+    with nullsfirst/nullslast, limit and offset. Any other filter is a 400.
+    `select` is ignored, so every column, including the embedded assistant,
+    is always returned."""
+
+    tables: dict = {}
+    lock = threading.Lock()
+
+    def route(self, method, url, body):
+        parts = [p for p in url.path.split("/") if p]
+        if parts[:2] != ["rest", "v1"] or len(parts) != 3:
+            return 404, {"message": "not found"}
+        table = parts[2]
+        params = parse_qsl(url.query, keep_blank_values=True)
+        filters = [(k, v) for k, v in params if k not in {"select", "order", "limit", "offset", "on_conflict"}]
+        options = dict(params)
+        single = "pgrst.object" in (self.headers.get("Accept") or "")
+
+        with self.lock:
+            rows = self.tables.setdefault(table, [])
+            if method == "POST":
+                new_rows = body if isinstance(body, list) else [body]
+                by_id = {r.get("id"): r for r in rows}
+                for new in new_rows:
+                    new = self.prepare_row(table, new)
+                    if new.get("id") in by_id and "on_conflict" in options:
+                        by_id[new["id"]].update(new)
+                    else:
+                        rows.append(new)
+                return 201, new_rows
+            try:
+                matched = [r for r in rows if all(_matches(r, k, v) for k, v in filters)]
+            except ValueError as unsupported:
+                return 400, {"message": str(unsupported)}
+            if method == "PATCH":
+                for r in matched:
+                    r.update(body)
+                return 200, matched
+            if method == "DELETE":
+                self.tables[table] = [r for r in rows if r not in matched]
+                return 200, matched
+
+        matched = _sort(matched, options.get("order") or "")
+        offset = int(options.get("offset", 0))
+        if "limit" in options:
+            matched = matched[offset:offset + int(options["limit"])]
+        if single:
+            return (200, matched[0]) if matched else (406, {"message": "No rows found"})
+        return 200, matched
+
+    def prepare_row(self, table: str, row: dict) -> dict:
+        row = dict(row)
+        if table == "calls":
+            row.setdefault("started_at", datetime.now(timezone.utc).isoformat())
+            row.setdefault("viewed", False)
+            assistant = next((a for a in self.tables.get("assistants", []) if a["id"] == row.get("assistant_id")), {})
+            row["assistant"] = {"assistant_name": assistant.get("assistant_name"), "teacher_id": assistant.get("teacher_id")}
+        return row
+
+
+def serve(handler_base, *, latency: float, failure_rate: float, **state) -> ThreadingHTTPServer:
+    """Start `handler_base` on a free localhost port in a daemon thread."""
+    handler = type(handler_base.__name__, (handler_base,), {"latency": latency, "failure_rate": failure_rate, **state})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def seed_supabase(teacher_ids: list[str], assistants_per_teacher: int, calls_per_teacher: int) -> dict:
+    """Build table contents for SupabaseHandler.tables."""
+    teachers, assistants, calls = [], [], []
+    now = time.time()
+    for t, teacher_id in enumerate(teacher_ids):
+        teachers.append({"id": teacher_id, "student_key": f"key-{t}"})
+        for a in range(assistants_per_teacher):
+            assistants.append({
+                "id": str(uuid.uuid4()), "teacher_id": teacher_id, "vapi_id": f"vapi-{t}-{a}",
+                "assistant_name": f"Assistant {a}", "system_prompt": "You are a patient tutor. " * 40,
+                "first_message": "Hola!", "description": "", "created_at": f"2024-01-01T00:00:{a:02d}Z",
+            })
+        teacher_assistants = assistants[-assistants_per_teacher:]
+        for c in range(calls_per_teacher):
+            assistant = teacher_assistants[c % len(teacher_assistants)]
+            calls.append({
+                "id": str(uuid.uuid4()), "assistant_id": assistant["id"], "student_name": f"Student {c % 30}",
+                "started_at": datetime.fromtimestamp(now - c * 600, timezone.utc).isoformat(),
+                "duration_sec": 180, "viewed": c % 3 == 0, "recording_url": None,
+                "summary": "Practised ordering food and past tense.",
+                "transcript": "AI: Hola, que tal?\nUser: Bien, um, gracias. Ayer comí en un restaurante.\n" * 8,
+                "assistant": {"assistant_name": assistant["assistant_name"], "teacher_id": teacher_id},
+            })
+    return {"teachers": teachers, "assistants": assistants, "calls": calls}
@@ -0,0 +1,301 @@
+"""Throughput / latency benchmark for the backend.
+
+Starts fake Vapi and Supabase servers, launches app.py against them in a
+subprocess, and drives a set of scenarios through real HTTP and Socket.IO:
+
+    python benchmarks/run.py                        # run everything, print a report
+    python benchmarks/run.py --scenarios webhooks dashboard --concurrency 32
+    python benchmarks/run.py --save-baseline        # record baselines/<name>.json
+    python benchmarks/run.py --compare              # diff against that baseline
+    python benchmarks/run.py --server-mode asgi --name asgi   # same scenarios, asyncio server
+
+Every run is written to benchmarks/results/<name>-<timestamp>.json.
+"""
+
+import argparse, json, logging, os, platform, socket, statistics, subprocess, sys, tempfile, threading, time, uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import jwt
+import requests
+import socketio
+
+from fake_services import SupabaseHandler, VapiHandler, seed_supabase, serve
+
+BENCH_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = BENCH_DIR.parent
+JWT_SECRET = "teachai-benchmark-jwt-secret-0123456789"
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def teacher_token(teacher_id: str) -> str:
+    return jwt.encode({"sub": teacher_id, "aud": "authenticated", "exp": int(time.time()) + 3600},
+                      JWT_SECRET, algorithm="HS256")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class Backend:
+    """app.py running in a subprocess, plus RSS sampling from /proc."""
+
+    def __init__(self, env: dict):
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.workdir = tempfile.mkdtemp(prefix="teachai-bench-")
+        self.proc = subprocess.Popen(
+            [sys.executable, "app.py"],
+            cwd=BACKEND_DIR,
+            env={
+                **os.environ,
+                **env,
+                "PORT": str(self.port),
+                "FLASK_DEBUG": "0",
+                "WEBHOOK_JOURNAL_PATH": os.path.join(self.workdir, "journal.db"),
+                "FILE_INDEX_PATH": os.path.join(self.workdir, "files.db"),
+                "SEARCH_INDEX_PATH": os.path.join(self.workdir, "search.db"),
+                "RECORDING_CACHE_DIR": os.path.join(self.workdir, "recordings"),
+            },
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+
+    def wait_ready(self, timeout: float = 30.0):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError(f"app.py exited:\n{self.proc.stderr.read().decode()[-4000:]}")
+            try:
+                requests.get(f"{self.url}/metrics", timeout=1)
+                return
+            except requests.RequestException:
+                time.sleep(0.2)
+        raise RuntimeError("app.py did not start in time")
+
+    def memory_kb(self) -> dict:
+        """Current and peak resident set size (Linux only; empty elsewhere)."""
+        try:
+            status = Path(f"/proc/{self.proc.pid}/status").read_text()
+        except OSError:
+            return {}
+        fields = dict(line.split(":", 1) for line in status.splitlines() if ":" in line)
+        return {key: int(fields[key].split()[0]) for key in ("VmRSS", "VmHWM") if key in fields}
+
+    def stop(self):
+        self.proc.terminate()
+        try:
+            self.proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+
+def run_load(name: str, backend: Backend, task, count: int, concurrency: int) -> dict:
+    """Run `task(i) -> bool` `count` times on `concurrency` threads and summarise."""
+    latencies, errors = [], 0
+    lock = threading.Lock()
+
+    def timed(i):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            ok = task(i)
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            errors += not ok
+
+    mem_before = backend.memory_kb()
+    wall = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(timed, range(count)))
+    wall = time.perf_counter() - wall
+    mem_after = backend.memory_kb()
+
+    return {
+        "scenario": name,
+        "requests": count,
+        "concurrency": concurrency,
+        "errors": errors,
+        "seconds": round(wall, 3),
+        "throughput_rps": round(count / wall, 1) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+        "rss_kb_before": mem_before.get("VmRSS"),
+        "rss_kb_after": mem_after.get("VmRSS"),
+        "rss_kb_peak": mem_after.get("VmHWM"),
+    }
+
+
+class Scenarios:
+    def __init__(self, backend: Backend, seed: dict, args):
+        self.backend = backend
+        self.seed = seed
+        self.args = args
+        self.local = threading.local()
+        self.teachers = [t["id"] for t in seed["teachers"]]
+        self.tokens = {t: teacher_token(t) for t in self.teachers}
+        self.vapi_ids = [a["vapi_id"] for a in seed["assistants"]]
+        self.open_sockets: list[socketio.Client] = []
+        self.sockets_lock = threading.Lock()
+
+    @property
+    def http(self) -> requests.Session:
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def auth(self, i: int) -> dict:
+        return {"Authorization": f"Bearer {self.tokens[self.teachers[i % len(self.teachers)]]}"}
+
+    def webhooks(self, i: int) -> bool:
+        """A status-update followed by an end-of-call report, as Vapi sends when a call ends."""
+        call = {"id": f"bench-{uuid.uuid4()}"}
+        url = f"{self.backend.url}/vapi-webhook"
+        ended = self.http.post(url, json={"message": {"type": "status-update", "status": "ended", "call": call}})
+        report = self.http.post(url, json={"message": {
+            "type": "end-of-call-report", "call": call, "summary": "Short practice call.",
+            "transcript": "AI: Hola\nUser: Hola, um, buenos días\n" * 20, "recordingUrl": None,
+        }})
+        return ended.ok and report.ok
+
+    def start_call(self, i: int) -> bool:
+        resp = self.http.post(f"{self.backend.url}/start-call", json={
+            "assistantId": self.vapi_ids[i % len(self.vapi_ids)],
+            "studentName": f"Student {i}",
+            "studentNumber": "+15550000000",
+        })
+        return resp.status_code == 201
+
+    def dashboard(self, i: int) -> bool:
+        """One poll of the teacher dashboard: calls page, assistants and active calls."""
+        headers = self.auth(i)
+        paths = ("/teacher-calls?limit=50", "/teacher/assistants", "/active-calls")
+        return all(self.http.get(f"{self.backend.url}{p}", headers=headers).ok for p in paths)
+
+    def student_metrics(self, i: int) -> bool:
+        return self.http.get(f"{self.backend.url}/teacher/student-metrics", headers=self.auth(i)).ok
+
+    def sockets(self, i: int) -> bool:
+        """Connect a teacher socket, wait for the active_calls snapshot, and hold it open."""
+        client = socketio.Client(reconnection=False)
+        snapshot = threading.Event()
+        client.on("active_calls", lambda data: snapshot.set(), namespace="/teacher")
+        token = self.tokens[self.teachers[i % len(self.teachers)]]
+        client.connect(self.backend.url, namespaces=["/teacher"], auth={"token": token},
+                       transports=["websocket"], wait_timeout=10)
+        ok = snapshot.wait(10)
+        with self.sockets_lock:
+            self.open_sockets.append(client)
+        return ok
+
+    def close_sockets(self):
+        for client in self.open_sockets:
+            try:
+                client.disconnect()
+            except Exception:
+                pass
+        self.open_sockets.clear()
+
+
+SCENARIOS = ("webhooks", "start_call", "dashboard", "student_metrics", "sockets")
+
+
+def compare(results: list[dict], baseline: list[dict]):
+    base = {r["scenario"]: r for r in baseline}
+    print("\nvs baseline:")
+    for r in results:
+        b = base.get(r["scenario"])
+        if not b:
+            continue
+        def delta(key):
+            return f"{(r[key] - b[key]) / b[key] * 100:+.1f}%" if b.get(key) else "n/a"
+        print(f"  {r['scenario']:<16} throughput {delta('throughput_rps'):>8}   "
+              f"p50 {delta('p50_ms'):>8}   p99 {delta('p99_ms'):>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=500, help="operations per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--sockets", type=int, default=200, help="teacher sockets to open")
+    parser.add_argument("--teachers", type=int, default=20)
+    parser.add_argument("--calls-per-teacher", type=int, default=300)
+    parser.add_argument("--vapi-latency-ms", type=float, default=80)
+    parser.add_argument("--vapi-failure-rate", type=float, default=0.0)
+    parser.add_argument("--supabase-latency-ms", type=float, default=15)
+    parser.add_argument("--supabase-failure-rate", type=float, default=0.0)
+    parser.add_argument("--server-mode", choices=["eventlet", "asgi"], default="eventlet")
+    parser.add_argument("--name", default="default", help="baseline name")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    args = parser.parse_args()
+    # Closing hundreds of client sockets is noisy at the default level
+    logging.getLogger("engineio.client").setLevel(logging.CRITICAL)
+    logging.getLogger("socketio.client").setLevel(logging.CRITICAL)
+
+    seed = seed_supabase([str(uuid.uuid4()) for _ in range(args.teachers)], 3, args.calls_per_teacher)
+    vapi = serve(VapiHandler, latency=args.vapi_latency_ms / 1000, failure_rate=args.vapi_failure_rate, calls={})
+    supa = serve(SupabaseHandler, latency=args.supabase_latency_ms / 1000,
+                 failure_rate=args.supabase_failure_rate, tables=seed)
+
+    backend = Backend({
+        "VAPI_API_URL": f"http://127.0.0.1:{vapi.server_port}",
+        "VAPI_API_KEY": "bench",
+        "VAPI_PHONE_NUMBER_ID": "bench-phone",
+        "SUPABASE_URL": f"http://127.0.0.1:{supa.server_port}",
+        "SUPABASE_SERVICE_KEY": jwt.encode({"role": "service_role"}, JWT_SECRET, algorithm="HS256"),
+        "SUPABASE_JWT_SECRET": JWT_SECRET,
+        "SEARCH_REBUILD_ON_START": "false",
+        "SERVER_MODE": args.server_mode,
+    })
+    results = []
+    try:
+        backend.wait_ready()
+        scenarios = Scenarios(backend, seed, args)
+        for name in args.scenarios:
+            count = args.sockets if name == "sockets" else args.requests
+            result = run_load(name, backend, getattr(scenarios, name), count, args.concurrency)
+            scenarios.close_sockets()
+            results.append(result)
+            print(f"{name:<16} {result['throughput_rps']:>8} req/s   p50 {result['p50_ms']:>8} ms   "
+                  f"p99 {result['p99_ms']:>8} ms   errors {result['errors']:>4}   "
+                  f"rss {result['rss_kb_after'] or '?'} kB")
+    finally:
+        backend.stop()
+        vapi.shutdown()
+        supa.shutdown()
+
+    report = {
+        "name": args.name,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "config": vars(args),
+        "results": results,
+    }
+    (BENCH_DIR / "results").mkdir(exist_ok=True)
+    (BENCH_DIR / "results" / f"{args.name}-{int(time.time())}.json").write_text(json.dumps(report, indent=2))
+
+    baseline_path = BENCH_DIR / "baselines" / f"{args.name}.json"
+    if args.compare and baseline_path.exists():
+        compare(results, json.loads(baseline_path.read_text())["results"])
+    if args.save_baseline:
+        baseline_path.parent.mkdir(exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2))
+        print(f"\nBaseline saved to {baseline_path}")
+
+
+if __name__ == "__main__":
+    main()
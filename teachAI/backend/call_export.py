@@ -0,0 +1,47 @@
+import csv, io, json, zlib
+
+FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+}
+
+
+def flatten(row: dict) -> dict:
+    """Export view of a calls row: the assistant embed becomes `assistant_name`."""
+    row = dict(row)
+    assistant = row.pop("assistant", None) or {}
+    row["assistant_name"] = assistant.get("assistant_name")
+    return row
+
+
+def ndjson_chunks(pages):
+    """One encoded chunk per page of rows, a JSON object per line."""
+    for page in pages:
+        yield "".join(json.dumps(flatten(row), ensure_ascii=False) + "\n" for row in page).encode()
+
+
+def csv_chunks(pages, columns: list[str]):
+    """The header row right away, then one encoded chunk per page of rows."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+
+    def drain() -> bytes:
+        data = buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    writer.writeheader()
+    yield drain()
+    for page in pages:
+        writer.writerows(flatten(row) for row in page)
+        yield drain()
+
+
+def gzip_chunks(chunks, level: int = 6):
+    """Gzip a chunk stream incrementally. Each chunk is sync-flushed so the
+    client gets every page as soon as it's read, not when the buffer fills."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
@@ -0,0 +1,128 @@
+import heapq, logging, threading, time
+
+ENDED_STATUSES = {"ended"}
+
+
+class CallLifecycle:
+    """Expire active calls whose end webhooks never arrived.
+
+    Every tracked call has one deadline in a min-heap; when it comes due the
+    call is checked against Vapi. Due calls are reconciled together with a
+    single list request (`list_calls(created_after)`), falling back to
+    `get_call(call_id)` only for calls that don't appear in that page. Calls
+    Vapi reports as ended, or older than `max_age`, go to `on_ended(call_id,
+    vapi_call)`; the rest are passed to `on_active(call_id, vapi_call)` and
+    re-armed `recheck_after` seconds later.
+
+    The store stays the source of truth: heap entries for calls that have
+    since left it are skipped when they surface, and the heap is rebuilt
+    whenever stale entries outnumber live ones, so its size tracks the
+    number of active calls rather than uptime.
+    """
+
+    def __init__(self, store, *, list_calls, get_call, on_ended, on_active=None, first_check: float = 900.0,
+                 recheck_after: float = 300.0, max_age: float = 3 * 3600, interval: float = 30.0,
+                 max_individual_checks: int = 20, clock=time.time, logger=None):
+        self.store = store
+        self.list_calls = list_calls
+        self.get_call = get_call
+        self.on_ended = on_ended
+        self.on_active = on_active
+        self.first_check = first_check
+        self.recheck_after = recheck_after
+        self.max_age = max_age
+        self.interval = interval
+        self.max_individual_checks = max_individual_checks
+        self.clock = clock
+        self.logger = logger or logging.getLogger(__name__)
+        self._heap: list[tuple[float, str]] = []
+        self._lock = threading.Lock()
+        self._running = False
+
+    def track(self, call_id: str, started_at: float | None = None, delay: float | None = None):
+        started_at = started_at or self.clock()
+        deadline = started_at + (self.first_check if delay is None else delay)
+        with self._lock:
+            heapq.heappush(self._heap, (deadline, call_id))
+            if len(self._heap) > 2 * len(self.store) + 64:
+                self._compact()
+
+    def _compact(self):
+        live = {info["callId"] for info in self.store.values()}
+        earliest: dict[str, float] = {}
+        for deadline, call_id in self._heap:
+            if call_id in live and deadline < earliest.get(call_id, float("inf")):
+                earliest[call_id] = deadline
+        self._heap = [(deadline, call_id) for call_id, deadline in earliest.items()]
+        heapq.heapify(self._heap)
+
+    def __len__(self):
+        return len(self._heap)
+
+    def due(self, now: float | None = None) -> list[str]:
+        """Pop every call whose deadline has passed and that is still active."""
+        now = self.clock() if now is None else now
+        due = set()
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, call_id = heapq.heappop(self._heap)
+                due.add(call_id)
+        return [call_id for call_id in due if call_id in self.store]
+
+    def reconcile(self, call_ids: list[str]) -> int:
+        """Check `call_ids` against Vapi; returns how many were ended."""
+        if not call_ids:
+            return 0
+        now = self.clock()
+        infos = {call_id: self.store.get(call_id) or {} for call_id in call_ids}
+        oldest = min((info.get("startTime") or now) for info in infos.values())
+
+        remote = {}
+        try:
+            for call in self.list_calls(oldest - 60):
+                remote[call.get("id")] = call
+        except Exception as exc:
+            self.logger.warning(f"Bulk call reconcile failed: {exc}")
+
+        missing = [call_id for call_id in call_ids if call_id not in remote]
+        for call_id in missing[: self.max_individual_checks]:
+            try:
+                remote[call_id] = self.get_call(call_id)
+            except Exception as exc:
+                self.logger.warning(f"Could not check call {call_id}: {exc}")
+
+        ended = 0
+        for call_id, info in infos.items():
+            call = remote.get(call_id)
+            too_old = now - (info.get("startTime") or now) > self.max_age
+            if (call and call.get("status") in ENDED_STATUSES) or too_old:
+                self.on_ended(call_id, call or {})
+                ended += 1
+            else:
+                if call and self.on_active:
+                    self.on_active(call_id, call)
+                self.track(call_id, now, self.recheck_after)
+        return ended
+
+    def run_once(self) -> int:
+        return self.reconcile(self.due())
+
+    def run(self, sleep=time.sleep):
+        while self._running:
+            try:
+                ended = self.run_once()
+                if ended:
+                    self.logger.info(f"Call lifecycle expired {ended} stale calls")
+            except Exception:
+                self.logger.exception("Call lifecycle error")
+            sleep(self.interval)
+
+    def start(self, spawn, sleep=time.sleep):
+        """Start the expiry loop with `spawn(fn, *args)`, e.g. socketio.start_background_task."""
+        if self._running:
+            return
+        self._running = True
+        spawn(self.run, sleep)
+
+    def stop(self):
+        self._running = False
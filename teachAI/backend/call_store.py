@@ -0,0 +1,101 @@
+import json, threading
+
+
+class MemoryCallStore:
+    """Active-call registry for a single process."""
+
+    def __init__(self):
+        self._calls: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def get(self, call_id: str) -> dict | None:
+        with self._lock:
+            info = self._calls.get(call_id)
+            return dict(info) if info is not None else None
+
+    def put(self, call_id: str, info: dict):
+        with self._lock:
+            self._calls[call_id] = dict(info)
+
+    def update(self, call_id: str, **fields) -> dict | None:
+        """Merge `fields` into an existing call. Returns the new info, or None if unknown."""
+        with self._lock:
+            info = self._calls.get(call_id)
+            if info is None:
+                return None
+            info.update(fields)
+            return dict(info)
+
+    def pop(self, call_id: str) -> dict | None:
+        with self._lock:
+            return self._calls.pop(call_id, None)
+
+    def values(self) -> list[dict]:
+        with self._lock:
+            return [dict(info) for info in self._calls.values()]
+
+    def __contains__(self, call_id) -> bool:
+        return call_id in self._calls
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+
+class RedisCallStore:
+    """Active-call registry shared by every worker through one Redis hash.
+
+    `client` needs hget/hset/hdel/hvals/hexists/hlen plus `transaction` for
+    the WATCH/MULTI in `update`, so fakeredis can stand in for it locally.
+    """
+
+    def __init__(self, client, key: str = "teachai:active_calls"):
+        self.client = client
+        self.key = key
+
+    @staticmethod
+    def _load(raw) -> dict | None:
+        return json.loads(raw) if raw is not None else None
+
+    def get(self, call_id: str) -> dict | None:
+        return self._load(self.client.hget(self.key, call_id))
+
+    def put(self, call_id: str, info: dict):
+        self.client.hset(self.key, call_id, json.dumps(info))
+
+    def update(self, call_id: str, **fields) -> dict | None:
+        """Merge `fields` into an existing call under WATCH, so a call another
+        worker pops (or updates) between the read and the write is retried
+        rather than resurrected or overwritten."""
+        def merge(pipe):
+            info = self._load(pipe.hget(self.key, call_id))
+            if info is None:
+                return None
+            info.update(fields)
+            pipe.multi()
+            pipe.hset(self.key, call_id, json.dumps(info))
+            return info
+
+        return self.client.transaction(merge, self.key, value_from_callable=True)
+
+    def pop(self, call_id: str) -> dict | None:
+        info = self.get(call_id)
+        if info is not None and not self.client.hdel(self.key, call_id):
+            return None  # another worker removed it first
+        return info
+
+    def values(self) -> list[dict]:
+        return [json.loads(raw) for raw in self.client.hvals(self.key)]
+
+    def __contains__(self, call_id) -> bool:
+        return bool(self.client.hexists(self.key, call_id))
+
+    def __len__(self) -> int:
+        return self.client.hlen(self.key)
+
+
+def create_call_store(redis_url: str | None = None):
+    """Redis-backed store when `redis_url` is set, otherwise in-process."""
+    if not redis_url:
+        return MemoryCallStore()
+    import redis
+    return RedisCallStore(redis.Redis.from_url(redis_url))
@@ -0,0 +1,157 @@
+import logging, queue, threading, time, uuid
+
+
+class _Channel:
+    def __init__(self, call_id: str, max_queue: int):
+        self.call_id = call_id
+        self.queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        # Set once the close() sentinel has been taken off the queue
+        self.closed = False
+        # Consecutive failed deliveries; at the pipeline's max_failures the rest are refused
+        self.failures = 0
+
+
+def coalesce(items: list[dict]) -> list[list[dict]]:
+    """Group queued items, in order, into deliveries.
+
+    Consecutive `say` items for the same controlUrl are merged so the
+    assistant speaks them as one utterance; a say that ends the call closes
+    its group. Everything else is delivered on its own.
+    """
+    groups: list[list[dict]] = []
+    for item in items:
+        last = groups[-1] if groups else None
+        if (
+            last is not None
+            and item["kind"] == "say" and last[-1]["kind"] == "say"
+            and item["payload"]["controlUrl"] == last[-1]["payload"]["controlUrl"]
+            and not last[-1]["payload"].get("endCallAfterSpoken")
+        ):
+            last.append(item)
+        else:
+            groups.append([item])
+    return groups
+
+
+class ControlPipeline:
+    """One ordered queue per call for everything a teacher sends into it.
+
+    Items are delivered strictly in FIFO order by a single worker per call,
+    which waits `coalesce_window` after the first item so a burst of hints
+    becomes one delivery. `deliver(call_id, kind, payload)` does the actual
+    send and raises on failure; `notify(target, ack)` reports the outcome of
+    each delivery to whoever queued the items. A call's worker exits after
+    `idle_timeout` seconds with nothing to send, and `close()` drops it early.
+    After `max_failures` consecutive failed deliveries the call's remaining
+    items are failed without sending until its worker retires.
+    """
+
+    def __init__(self, deliver, notify, spawn, sleep=time.sleep, *, coalesce_window: float = 0.3,
+                 idle_timeout: float = 30.0, max_queue: int = 50, max_failures: int = 3, logger=None):
+        self.deliver = deliver
+        self.notify = notify
+        self.spawn = spawn
+        self.sleep = sleep
+        self.coalesce_window = coalesce_window
+        self.idle_timeout = idle_timeout
+        self.max_queue = max_queue
+        self.max_failures = max_failures
+        self.logger = logger or logging.getLogger(__name__)
+        self._channels: dict[str, _Channel] = {}
+        self._lock = threading.Lock()
+
+    def enqueue(self, call_id: str, kind: str, payload: dict, notify_to=None) -> str:
+        """Queue one item for `call_id` and return its message id.
+
+        Raises OverflowError if the call already has `max_queue` items waiting.
+        """
+        item = {"id": uuid.uuid4().hex, "kind": kind, "payload": payload,
+                "notify": notify_to, "queuedAt": time.time()}
+        with self._lock:
+            channel = self._channels.get(call_id)
+            if channel is None:
+                channel = self._channels[call_id] = _Channel(call_id, self.max_queue)
+                self.spawn(self._run, channel)
+            try:
+                channel.queue.put_nowait(item)
+            except queue.Full:
+                raise OverflowError(f"Too many queued control messages for call {call_id}")
+        return item["id"]
+
+    def close(self, call_id: str):
+        with self._lock:
+            channel = self._channels.pop(call_id, None)
+        if channel is not None:
+            channel.queue.put(None)
+
+    def pending(self, call_id: str) -> int:
+        channel = self._channels.get(call_id)
+        return channel.queue.qsize() if channel else 0
+
+    def _next_batch(self, channel: _Channel) -> list[dict] | None:
+        if channel.closed:
+            return None
+        try:
+            first = channel.queue.get(timeout=self.idle_timeout)
+        except queue.Empty:
+            with self._lock:
+                # Only retire the channel if nothing slipped in meanwhile
+                if channel.queue.empty() and self._channels.get(channel.call_id) is channel:
+                    del self._channels[channel.call_id]
+                    return None
+                if self._channels.get(channel.call_id) is not channel:
+                    return None  # closed; its sentinel was already consumed
+            return []
+        if first is None:
+            return None
+        if self.coalesce_window:
+            self.sleep(self.coalesce_window)
+        items = [first]
+        while True:
+            try:
+                item = channel.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Deliver what was queued ahead of close(), then stop
+                channel.closed = True
+                break
+            items.append(item)
+        return items
+
+    def _run(self, channel: _Channel):
+        while (items := self._next_batch(channel)) is not None:
+            for group in coalesce(items):
+                self._deliver_group(channel, group)
+
+    def _deliver_group(self, channel: _Channel, group: list[dict]):
+        call_id = channel.call_id
+        kind = group[0]["kind"]
+        payload = group[0]["payload"]
+        if len(group) > 1:
+            payload = {
+                **group[-1]["payload"],
+                "content": " ".join(item["payload"]["content"] for item in group),
+            }
+        if channel.failures >= self.max_failures:
+            ack = {"delivered": False, "error": f"Control channel gave up after {channel.failures} failed deliveries"}
+        else:
+            try:
+                self.deliver(call_id, kind, payload)
+                channel.failures = 0
+                ack = {"delivered": True}
+            except Exception as exc:
+                channel.failures += 1
+                self.logger.warning(f"Control delivery for {call_id} failed ({channel.failures}/{self.max_failures}): {exc}")
+                ack = {"delivered": False, "error": str(exc)}
+
+        by_target: dict = {}
+        for item in group:
+            by_target.setdefault(item["notify"], []).append(item["id"])
+        for target, message_ids in by_target.items():
+            if target is None:
+                continue
+            try:
+                self.notify(target, {"callId": call_id, "messageIds": message_ids, **ack})
+            except Exception:
+                self.logger.exception(f"Control ack for {call_id} failed")
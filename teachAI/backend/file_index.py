@@ -0,0 +1,35 @@
+import sqlite3, threading, time
+
+
+class FileHashIndex:
+    """SQLite map of uploaded file content (SHA-256) to its Vapi fileId."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS vapi_files (
+                sha256 TEXT PRIMARY KEY,
+                file_id TEXT NOT NULL,
+                filename TEXT,
+                size INTEGER,
+                created_at REAL NOT NULL
+            )
+        """)
+
+    def get(self, sha256: str) -> str | None:
+        with self._lock:
+            row = self._db.execute("SELECT file_id FROM vapi_files WHERE sha256 = ?", (sha256,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, sha256: str, file_id: str, filename: str, size: int):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO vapi_files (sha256, file_id, filename, size, created_at) VALUES (?, ?, ?, ?, ?)",
+                (sha256, file_id, filename, size, time.time()),
+            )
+
+    def forget(self, sha256: str):
+        with self._lock:
+            self._db.execute("DELETE FROM vapi_files WHERE sha256 = ?", (sha256,))
@@ -0,0 +1,8 @@
+-- Archived calls (POST /calls/bulk "archive" / "unarchive").
+-- /teacher-calls and /teacher-calls/export filter on this column, so apply it
+-- before deploying a backend that has the archive operation.
+alter table public.calls add column if not exists archived_at timestamptz;
+
+create index if not exists calls_archived_at_idx
+    on public.calls (archived_at)
+    where archived_at is not null;
@@ -0,0 +1,164 @@
+import hashlib, logging, os, threading, time, uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Iterator
+
+import requests
+
+
+class RecordingCache:
+    """Size-bounded LRU cache of call recordings on local disk.
+
+    `pinned(key)` yields the local file of a cached recording, safe from
+    eviction until the block exits. On a miss, `stream(key, url)` fetches the
+    recording from upstream and returns its chunks as they arrive, writing
+    them to the cache at the same time, so the first byte doesn't wait for
+    the whole download. Files are written under a temporary name and renamed
+    into place only once complete, so a reader never sees a partial
+    recording; once the cache grows past `max_bytes` the least recently used
+    unpinned recordings are deleted.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, *, session: requests.Session | None = None,
+                 timeout: float = 60.0, chunk_size: int = 1 << 14, logger=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        # Each relayed chunk waits for this many upstream bytes, so keep it small
+        self.chunk_size = chunk_size
+        self.logger = logger or logging.getLogger(__name__)
+        self._entries: OrderedDict[str, tuple[str, int]] = OrderedDict()
+        self._filling: set[str] = set()
+        self._pins: dict[str, int] = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load_existing()
+
+    def _load_existing(self):
+        """Rebuild the LRU order from what's already on disk (oldest mtime first)."""
+        files = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".part"):
+                os.remove(path)
+                continue
+            stat = os.stat(path)
+            files.append((stat.st_mtime, name.split(".", 1)[0], path, stat.st_size))
+        for _, stem, path, size in sorted(files):
+            self._entries[stem] = (path, size)
+        self._evict()
+
+    @property
+    def size(self) -> int:
+        return sum(size for _, size in self._entries.values())
+
+    def _stem(self, key: str) -> str:
+        return hashlib.sha1(key.encode()).hexdigest()
+
+    @contextmanager
+    def pinned(self, key: str):
+        """Path of the cached recording for `key`, or None on a miss. Eviction
+        skips it until the block exits, so open the file inside the block."""
+        stem = self._stem(key)
+        with self._lock:
+            entry = self._entries.get(stem)
+            if entry is not None and not os.path.exists(entry[0]):
+                del self._entries[stem]
+                entry = None
+            if entry is None:
+                path = None
+            else:
+                path = entry[0]
+                self._entries.move_to_end(stem)
+                self._pins[stem] = self._pins.get(stem, 0) + 1
+        if path is None:
+            yield None
+            return
+        try:
+            os.utime(path)
+            yield path
+        finally:
+            with self._lock:
+                if self._pins[stem] == 1:
+                    del self._pins[stem]
+                else:
+                    self._pins[stem] -= 1
+
+    def stream(self, key: str, url: str, *, extension: str = "",
+               range_header: str | None = None) -> tuple[requests.Response, Iterator[bytes]]:
+        """Open the upstream recording and return (response, chunks). A full
+        fetch is teed into the cache as it's read; Range requests, and misses
+        while another request is already filling `key`, pass through uncached.
+        Raises on connection errors and non-2xx upstream statuses."""
+        stem = self._stem(key)
+        resp = self.session.get(url, stream=True, timeout=self.timeout,
+                                headers={"Range": range_header} if range_header else None)
+        try:
+            resp.raise_for_status()
+        except BaseException:
+            resp.close()
+            raise
+        with self._lock:
+            fill = resp.status_code == 200 and not range_header and stem not in self._filling
+            if fill:
+                self._filling.add(stem)
+        return resp, (self._tee(stem, resp, extension) if fill else self._passthrough(resp))
+
+    def _passthrough(self, resp: requests.Response) -> Iterator[bytes]:
+        with resp:
+            yield from resp.iter_content(self.chunk_size)
+
+    def _tee(self, stem: str, resp: requests.Response, extension: str) -> Iterator[bytes]:
+        path = os.path.join(self.directory, f"{stem}{extension}")
+        tmp = f"{path}.{uuid.uuid4().hex}.part"
+        started, size, complete = time.perf_counter(), 0, False
+        try:
+            with resp, open(tmp, "wb") as out:
+                for chunk in resp.iter_content(self.chunk_size):
+                    out.write(chunk)
+                    size += len(chunk)
+                    yield chunk
+            complete = True
+        finally:
+            # A client that disconnects mid-way leaves nothing behind
+            if complete:
+                os.replace(tmp, path)
+                with self._lock:
+                    self._entries[stem] = (path, size)
+                    self._entries.move_to_end(stem)
+                    self._filling.discard(stem)
+                self.logger.info(f"Cached recording {stem} ({size} bytes in {time.perf_counter() - started:.1f}s)")
+                self._evict(keep=stem)
+            else:
+                with self._lock:
+                    self._filling.discard(stem)
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+
+    def _evict(self, keep: str | None = None):
+        with self._lock:
+            total = sum(size for _, size in self._entries.values())
+            victims = []
+            for stem in list(self._entries):
+                if total <= self.max_bytes:
+                    break
+                if stem == keep or stem in self._pins:
+                    continue
+                path, size = self._entries.pop(stem)
+                victims.append(path)
+                total -= size
+        for path in victims:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def forget(self, key: str):
+        with self._lock:
+            entry = self._entries.pop(self._stem(key), None)
+        if entry:
+            try:
+                os.remove(entry[0])
+            except OSError:
+                pass
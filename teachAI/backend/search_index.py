@@ -0,0 +1,145 @@
+import html, re, sqlite3, threading
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+# Placeholder highlight markers; snippets are HTML-escaped before they become `mark`
+OPEN_SENTINEL, CLOSE_SENTINEL = "\x02", "\x03"
+
+
+def fts_query(text: str) -> str | None:
+    """Turn free text into a safe FTS5 query: every word must match, and the
+    last one may be a prefix (so results update while the teacher types)."""
+    tokens = TOKEN_RE.findall(text or "")
+    if not tokens:
+        return None
+    quoted = [f'"{t}"' for t in tokens]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def highlight(snippet: str | None, mark: tuple[str, str]) -> str | None:
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(OPEN_SENTINEL, mark[0]).replace(CLOSE_SENTINEL, mark[1])
+
+
+class TranscriptSearchIndex:
+    """SQLite FTS5 index over call summaries and transcripts, scoped by teacher.
+
+    FTS5 can't index a lookup on call_id, so `call_keys` maps each call id to
+    the integer rowid of its FTS row; replacing or deleting a call is then a
+    rowid lookup instead of a scan of the whole index.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        keyed = self._db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'call_keys'"
+        ).fetchone() is not None
+        self._db.execute("CREATE TABLE IF NOT EXISTS call_keys (id INTEGER PRIMARY KEY, call_id TEXT NOT NULL UNIQUE)")
+        self._db.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS calls_fts USING fts5(
+                call_id UNINDEXED,
+                teacher_id UNINDEXED,
+                started_at UNINDEXED,
+                student_name,
+                summary,
+                transcript,
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+        """)
+        if not keyed:
+            # Rows from before call_keys existed can't be addressed; start over (the app rebuilds an empty index)
+            self._db.execute("DELETE FROM calls_fts")
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM calls_fts LIMIT 1").fetchone() is None
+
+    def upsert_many(self, docs: list[dict]):
+        """Index calls given as dicts with id, teacher_id, started_at,
+        student_name, summary and transcript. Existing entries are replaced."""
+        rows = [
+            (d["id"], d["teacher_id"], d.get("started_at"), d.get("student_name") or "",
+             d.get("summary") or "", d.get("transcript") or "")
+            for d in docs if d.get("id") and d.get("teacher_id")
+        ]
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany("INSERT OR IGNORE INTO call_keys (call_id) VALUES (?)", [(r[0],) for r in rows])
+                keyed = [
+                    (self._db.execute("SELECT id FROM call_keys WHERE call_id = ?", (r[0],)).fetchone()[0], *r)
+                    for r in rows
+                ]
+                self._db.executemany("DELETE FROM calls_fts WHERE rowid = ?", [(k[0],) for k in keyed])
+                self._db.executemany(
+                    "INSERT INTO calls_fts (rowid, call_id, teacher_id, started_at, student_name, summary, transcript) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    keyed,
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def upsert(self, doc: dict):
+        self.upsert_many([doc])
+
+    def delete(self, call_ids: list[str]):
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                for call_id in call_ids:
+                    key = self._db.execute("SELECT id FROM call_keys WHERE call_id = ?", (call_id,)).fetchone()
+                    if key:
+                        self._db.execute("DELETE FROM calls_fts WHERE rowid = ?", key)
+                        self._db.execute("DELETE FROM call_keys WHERE id = ?", key)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM calls_fts")
+            self._db.execute("DELETE FROM call_keys")
+
+    def optimize(self):
+        with self._lock:
+            self._db.execute("INSERT INTO calls_fts(calls_fts) VALUES ('optimize')")
+
+    def search(self, teacher_id: str, text: str, *, limit: int = 20, offset: int = 0,
+               mark: tuple[str, str] = ("<mark>", "</mark>")) -> list[dict]:
+        """Best matches first (BM25), with highlighted summary/transcript snippets.
+        Snippet text is HTML-escaped; only the `mark` tags are markup."""
+        query = fts_query(text)
+        if query is None:
+            return []
+        open_mark, close_mark = OPEN_SENTINEL, CLOSE_SENTINEL
+        with self._lock:
+            rows = self._db.execute(
+                """
+                SELECT call_id, student_name, started_at,
+                       snippet(calls_fts, 4, ?, ?, '…', 16),
+                       snippet(calls_fts, 5, ?, ?, '…', 24),
+                       bm25(calls_fts, 0, 0, 0, 2.0, 4.0, 1.0) AS score
+                FROM calls_fts
+                WHERE calls_fts MATCH ? AND teacher_id = ?
+                ORDER BY score
+                LIMIT ? OFFSET ?
+                """,
+                (open_mark, close_mark, open_mark, close_mark, query, teacher_id, limit, offset),
+            ).fetchall()
+        return [
+            {
+                "callId": call_id,
+                "studentName": student_name,
+                "startedAt": started_at,
+                "summarySnippet": highlight(summary, mark),
+                "transcriptSnippet": highlight(transcript, mark),
+                "score": round(-score, 4),
+            }
+            for call_id, student_name, started_at, summary, transcript, score in rows
+        ]
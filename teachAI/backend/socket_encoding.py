@@ -0,0 +1,131 @@
+import hashlib, json, threading
+
+try:
+    import msgpack
+except ImportError:  # every client gets JSON
+    msgpack = None
+
+ENCODINGS = ("json", "msgpack") if msgpack is not None else ("json",)
+
+# With deltas on, these events only carry what the client can't already know
+DELTA_VIEWS = {
+    "call_ended": lambda p: {"callId": p.get("callId"), "endTime": p.get("endTime"), "duration": p.get("duration")},
+}
+
+
+def client_options(auth: dict | None) -> tuple[str, bool]:
+    """(encoding, deltas) a teacher socket asked for in its connect `auth`."""
+    auth = auth or {}
+    encoding = auth.get("encoding") if auth.get("encoding") in ENCODINGS else "json"
+    return encoding, bool(auth.get("deltas"))
+
+
+def variant_room(room: str, encoding: str, deltas: bool) -> str:
+    return f"{room}:{encoding}:{'delta' if deltas else 'full'}"
+
+
+def encode(payload, encoding: str):
+    """msgpack goes out as a binary attachment; JSON clients get the object as-is."""
+    if encoding == "msgpack":
+        return msgpack.packb(payload, use_bin_type=True)
+    return payload
+
+
+def call_version(call: dict) -> str:
+    """Short content hash of an active call, so a client can tell the server
+    which version of each call it already shows."""
+    raw = json.dumps(call, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()[:12]
+
+
+def snapshot_delta(calls: list[dict], known) -> dict:
+    """An active_calls snapshot relative to the calls the client already holds.
+
+    `known` maps callId -> the version the client last got in `versions`; a
+    call is upserted unless that version still matches. A bare list of ids
+    (no versions) means every current call is upserted and only `remove` is
+    trimmed."""
+    if not isinstance(known, dict):
+        known = dict.fromkeys(known or [])
+    versions = {c["callId"]: call_version(c) for c in calls}
+    return {
+        "delta": True,
+        "upsert": [c for c in calls if known.get(c["callId"]) != versions[c["callId"]]],
+        "remove": sorted(set(known) - set(versions)),
+        "versions": versions,
+    }
+
+
+class VariantMembers:
+    """Teacher sockets per variant room, so TeacherEvents only emits the forms
+    someone is connected with. Counts live in one Redis hash shared by every
+    worker when a client is given (hincrby/hmget), else in this process. A
+    worker that dies before its disconnects leaves counts too high, which
+    only costs an extra emit."""
+
+    def __init__(self, client=None, key: str = "teachai:variant_rooms"):
+        self.client = client
+        self.key = key
+        self._counts: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def join(self, room: str):
+        if self.client is not None:
+            self.client.hincrby(self.key, room, 1)
+            return
+        with self._lock:
+            self._counts[room] = self._counts.get(room, 0) + 1
+
+    def leave(self, room: str):
+        # Zero counts are kept: deleting one could race a concurrent join
+        if self.client is not None:
+            self.client.hincrby(self.key, room, -1)
+            return
+        with self._lock:
+            self._counts[room] = max(self._counts.get(room, 0) - 1, 0)
+
+    def active(self, rooms: list[str]) -> set[str]:
+        if self.client is not None:
+            counts = self.client.hmget(self.key, rooms)
+        else:
+            with self._lock:
+                counts = [self._counts.get(room) for room in rooms]
+        return {room for room, count in zip(rooms, counts) if count is not None and int(count) > 0}
+
+
+def create_variant_members(redis_url: str | None = None) -> VariantMembers:
+    """Shared through Redis when `redis_url` is set, otherwise in-process."""
+    if not redis_url:
+        return VariantMembers()
+    import redis
+    return VariantMembers(redis.Redis.from_url(redis_url))
+
+
+class TeacherEvents:
+    """Emit teacher-room events in the (encoding, deltas) form each socket
+    opted into at connect time. Each distinct payload is built and emitted
+    once, to every variant room that gets it; with `members`, variant rooms
+    nobody joined are skipped."""
+
+    def __init__(self, emit, namespace: str = "/teacher", members: VariantMembers | None = None):
+        self._emit = emit
+        self.namespace = namespace
+        self.members = members
+
+    def emit(self, event: str, payload: dict, room: str):
+        view = DELTA_VIEWS.get(event)
+        variants = {
+            variant_room(room, encoding, deltas): (encoding, deltas and view is not None)
+            for encoding in ENCODINGS
+            for deltas in (False, True)
+        }
+        live = self.members.active(list(variants)) if self.members is not None else set(variants)
+
+        # Without a delta view the full and delta rooms get the same bytes
+        targets: dict[tuple[str, bool], list[str]] = {}
+        for target, form in variants.items():
+            if target in live:
+                targets.setdefault(form, []).append(target)
+        for (encoding, as_delta), rooms in targets.items():
+            data = view(payload) if as_delta else payload
+            self._emit(event, encode(data, encoding), namespace=self.namespace, to=rooms)
@@ -0,0 +1,93 @@
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, has_request_context, request
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Gauge, Histogram, generate_latest
+
+registry = CollectorRegistry()
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+http_latency = Histogram(
+    "teachai_http_request_seconds", "Time to handle an HTTP request",
+    ["route", "method", "status"], buckets=LATENCY_BUCKETS, registry=registry,
+)
+db_latency = Histogram(
+    "teachai_db_query_seconds", "Time spent in a Supabase query, by db_exec context",
+    ["context", "outcome"], buckets=LATENCY_BUCKETS, registry=registry,
+)
+vapi_latency = Histogram(
+    "teachai_vapi_request_seconds", "Time per outbound Vapi request attempt",
+    ["endpoint", "method", "status"], buckets=LATENCY_BUCKETS, registry=registry,
+)
+socket_connections = Gauge(
+    "teachai_socketio_connections", "Open Socket.IO connections", ["namespace"], registry=registry,
+)
+active_calls_gauge = Gauge("teachai_active_calls", "Calls currently tracked as active", registry=registry)
+
+
+def record_stage(name: str, seconds: float):
+    """Add time to the current request's stage breakdown (no-op outside a request)."""
+    if has_request_context() and hasattr(g, "stages"):
+        g.stages[name] = g.stages.get(name, 0.0) + seconds
+
+
+@contextmanager
+def stage(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+
+def observe_db(context: str, seconds: float, ok: bool):
+    db_latency.labels(context or "unnamed", "ok" if ok else "error").observe(seconds)
+    record_stage(f"db:{context or 'unnamed'}", seconds)
+
+
+def observe_vapi(endpoint: str, method: str, status, seconds: float):
+    vapi_latency.labels(endpoint, method, str(status)).observe(seconds)
+    record_stage(f"vapi:{endpoint}", seconds)
+
+
+def init_app(app, *, active_calls=None, slow_ms: float | None = None, token: str | None = None,
+             public: bool = False):
+    """Time every request, log slow ones with their stage breakdown, and
+    serve Prometheus metrics on /metrics. Scrapes must send `token` as a
+    bearer token; without one configured the endpoint stays closed unless
+    `public` is set (local development)."""
+    if active_calls is not None:
+        active_calls_gauge.set_function(lambda: len(active_calls))
+
+    @app.before_request
+    def _start_timer():
+        g.request_start = time.perf_counter()
+        g.stages = {}
+
+    @app.after_request
+    def _observe_request(response):
+        start = g.pop("request_start", None)
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        http_latency.labels(route, request.method, str(response.status_code)).observe(elapsed)
+
+        if slow_ms is not None and elapsed * 1000 >= slow_ms:
+            stages = g.get("stages", {})
+            other = elapsed - sum(stages.values())
+            breakdown = ", ".join(f"{name}={secs * 1000:.0f}ms" for name, secs in stages.items())
+            app.logger.warning(
+                f"Slow request {request.method} {route} {response.status_code} "
+                f"{elapsed * 1000:.0f}ms ({breakdown or 'no stages'}, other={max(other, 0) * 1000:.0f}ms)"
+            )
+        return response
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        if not token and not public:
+            return Response("Metrics disabled: set METRICS_TOKEN\n", status=401, mimetype="text/plain")
+        if token and request.headers.get("Authorization") != f"Bearer {token}":
+            return Response("Unauthorized\n", status=401, mimetype="text/plain")
+        return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,93 @@
+import threading, time
+from collections import OrderedDict
+
+import jwt
+
+
+class TokenVerifier:
+    """Resolve Supabase access tokens to user ids without a network hop.
+
+    Tokens are verified locally against the project's JWT secret (HS256) or
+    its JWKS endpoint (RS256/ES256). Results live in a bounded LRU cache until
+    the token's own `exp`. When local verification isn't configured, or the
+    token is signed with a key we can't resolve, `remote_verify` (normally
+    `supabase.auth.get_user`) is used instead if `fallback` is enabled.
+    """
+
+    def __init__(self, *, jwt_secret: str | None = None, jwks_url: str | None = None,
+                 audience: str = "authenticated", remote_verify=None, fallback: bool = True,
+                 max_entries: int = 2048, remote_ttl: int = 60, leeway: int = 10):
+        self.jwt_secret = jwt_secret
+        self.jwks_client = jwt.PyJWKClient(jwks_url, cache_keys=True) if jwks_url else None
+        self.audience = audience
+        self.remote_verify = remote_verify
+        self.fallback = fallback
+        self.max_entries = max_entries
+        self.remote_ttl = remote_ttl
+        self.leeway = leeway
+        self._cache: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cache_get(self, token: str) -> str | None:
+        with self._lock:
+            entry = self._cache.get(token)
+            if entry is None:
+                return None
+            user_id, expires_at = entry
+            if expires_at <= time.time():
+                del self._cache[token]
+                return None
+            self._cache.move_to_end(token)
+            return user_id
+
+    def _cache_put(self, token: str, user_id: str, expires_at: float):
+        with self._lock:
+            self._cache[token] = (user_id, expires_at)
+            self._cache.move_to_end(token)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def invalidate(self, token: str):
+        with self._lock:
+            self._cache.pop(token, None)
+
+    def _decode_locally(self, token: str) -> dict:
+        options = {"require": ["exp", "sub"]}
+        if self.jwt_secret and jwt.get_unverified_header(token).get("alg") == "HS256":
+            return jwt.decode(token, self.jwt_secret, algorithms=["HS256"],
+                              audience=self.audience, leeway=self.leeway, options=options)
+        if self.jwks_client:
+            key = self.jwks_client.get_signing_key_from_jwt(token)
+            return jwt.decode(token, key.key, algorithms=["RS256", "ES256"],
+                              audience=self.audience, leeway=self.leeway, options=options)
+        raise LookupError("No local key configured for this token")
+
+    def _verify_remotely(self, token: str) -> str:
+        if not (self.fallback and self.remote_verify):
+            raise PermissionError("Token cannot be verified locally")
+        user_id = self.remote_verify(token)
+        if not user_id:
+            raise PermissionError("Invalid token")
+        try:
+            exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+        except jwt.PyJWTError:
+            exp = None
+        expires_at = time.time() + self.remote_ttl
+        self._cache_put(token, user_id, min(expires_at, exp) if exp else expires_at)
+        return user_id
+
+    def verify(self, token: str) -> str:
+        """Return the user id for `token` or raise PermissionError."""
+        user_id = self._cache_get(token)
+        if user_id:
+            return user_id
+
+        try:
+            claims = self._decode_locally(token)
+        except (LookupError, jwt.PyJWKClientError, jwt.InvalidAlgorithmError):
+            return self._verify_remotely(token)
+        except jwt.PyJWTError as exc:
+            raise PermissionError(f"Invalid token: {exc}")
+
+        self._cache_put(token, claims["sub"], claims["exp"])
+        return claims["sub"]
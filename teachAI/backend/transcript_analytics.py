@@ -0,0 +1,125 @@
+import re
+
+import numpy as np
+
+STUDENT_SPEAKERS = {"user", "student", "customer"}
+ASSISTANT_SPEAKERS = {"ai", "assistant", "bot"}
+SPEAKER_RE = re.compile(r"^\s*([A-Za-z]+)\s*:\s*(.*)$")
+WORD_RE = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?", re.UNICODE)
+HESITATION_RE = re.compile(r"^(u+m+|u+h+m*|e+r+m*|h+m+|a+h+|e+h+)$")
+
+# Raw per-call counts; every derived metric (and per-student aggregate) is built from these
+COUNT_FIELDS = ("total_words", "student_words", "total_turns", "student_turns",
+                "hesitations", "unique_student_words", "duration_sec")
+
+
+def parse_turns(transcript: str) -> list[tuple[bool, str]]:
+    """Split a Vapi transcript ("AI: ...\\nUser: ...") into (is_student, text) turns.
+    Lines without a speaker prefix continue the previous turn."""
+    turns: list[tuple[bool, str]] = []
+    for line in (transcript or "").splitlines():
+        match = SPEAKER_RE.match(line)
+        speaker = match.group(1).lower() if match else None
+        if speaker in STUDENT_SPEAKERS or speaker in ASSISTANT_SPEAKERS:
+            turns.append((speaker in STUDENT_SPEAKERS, match.group(2)))
+        elif turns and line.strip():
+            is_student, text = turns[-1]
+            turns[-1] = (is_student, f"{text} {line.strip()}")
+    return turns
+
+
+class TurnTable:
+    """Column arrays for a batch of transcripts: one row per turn and one per word."""
+
+    def __init__(self, transcripts: list[str]):
+        vocab: dict[str, int] = {}
+        turn_call, turn_student = [], []
+        word_call, word_student, word_id = [], [], []
+
+        for call_idx, transcript in enumerate(transcripts):
+            for is_student, text in parse_turns(transcript):
+                turn_call.append(call_idx)
+                turn_student.append(is_student)
+                for word in WORD_RE.findall(text.lower()):
+                    word_call.append(call_idx)
+                    word_student.append(is_student)
+                    word_id.append(vocab.setdefault(word, len(vocab)))
+
+        self.n_calls = len(transcripts)
+        self.vocab_size = max(len(vocab), 1)
+        self.turn_call = np.asarray(turn_call, dtype=np.int64)
+        self.turn_student = np.asarray(turn_student, dtype=bool)
+        self.word_call = np.asarray(word_call, dtype=np.int64)
+        self.word_student = np.asarray(word_student, dtype=bool)
+        self.word_id = np.asarray(word_id, dtype=np.int64)
+        # Classify each distinct word once, then broadcast through word_id
+        self.vocab_hesitation = np.fromiter((bool(HESITATION_RE.match(w)) for w in vocab),
+                                            dtype=bool, count=len(vocab))
+
+
+def analyze_calls(transcripts: list[str], durations: list[float | None]) -> list[dict]:
+    """Per-call raw counts for a batch of transcripts, computed column-wise."""
+    table = TurnTable(transcripts)
+    n = table.n_calls
+    student = table.word_student
+
+    total_words = np.bincount(table.word_call, minlength=n)
+    student_words = np.bincount(table.word_call[student], minlength=n)
+    total_turns = np.bincount(table.turn_call, minlength=n)
+    student_turns = np.bincount(table.turn_call[table.turn_student], minlength=n)
+    hesitations = np.bincount(table.word_call[student],
+                              weights=table.vocab_hesitation[table.word_id[student]], minlength=n)
+    # Distinct (call, word) pairs among student words
+    pair_keys = np.unique(table.word_call[student] * table.vocab_size + table.word_id[student])
+    unique_student_words = np.bincount(pair_keys // table.vocab_size, minlength=n)
+    duration_sec = np.asarray([d or 0 for d in durations], dtype=np.float64)
+
+    columns = (total_words, student_words, total_turns, student_turns,
+               hesitations, unique_student_words, duration_sec)
+    return [
+        {field: float(col[i]) if field == "duration_sec" else int(col[i]) for field, col in zip(COUNT_FIELDS, columns)}
+        for i in range(n)
+    ]
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator, dtype=np.float64),
+                     where=denominator > 0)
+
+
+def aggregate_by_student(students: list[str], counts: list[dict]) -> list[dict]:
+    """Combine per-call counts into per-student speaking metrics in one pass.
+
+    talkRatio is the student's share of all words spoken; wordsPerMinute is
+    student words per minute of call time (transcripts carry no per-turn timing).
+    """
+    if not counts:
+        return []
+    names, group = np.unique(np.asarray([s or "Unknown" for s in students], dtype=object), return_inverse=True)
+    matrix = np.array([[c[f] for f in COUNT_FIELDS] for c in counts], dtype=np.float64)
+    col = {f: matrix[:, i] for i, f in enumerate(COUNT_FIELDS)}
+    sums = {f: np.bincount(group, weights=col[f], minlength=len(names)) for f in COUNT_FIELDS}
+    n_calls = np.bincount(group, minlength=len(names))
+    # Type-token ratio doesn't add up across calls, so average it over calls where the student spoke
+    per_call_ttr = _ratio(col["unique_student_words"], col["student_words"])
+    spoke = np.bincount(group, weights=col["student_words"] > 0, minlength=len(names))
+    lexical_diversity = _ratio(np.bincount(group, weights=per_call_ttr, minlength=len(names)), spoke)
+
+    talk_ratio = _ratio(sums["student_words"], sums["total_words"])
+    wpm = _ratio(sums["student_words"], sums["duration_sec"] / 60)
+    hesitation_rate = _ratio(sums["hesitations"] * 100, sums["student_words"])
+
+    return [
+        {
+            "student": names[i],
+            "calls": int(n_calls[i]),
+            "studentWords": int(sums["student_words"][i]),
+            "studentTurns": int(sums["student_turns"][i]),
+            "totalTurns": int(sums["total_turns"][i]),
+            "talkRatio": round(float(talk_ratio[i]), 3),
+            "wordsPerMinute": round(float(wpm[i]), 1),
+            "lexicalDiversity": round(float(lexical_diversity[i]), 3),
+            "hesitationsPer100Words": round(float(hesitation_rate[i]), 2),
+        }
+        for i in range(len(names))
+    ]
@@ -0,0 +1,209 @@
+import json, logging, queue, threading, time
+from collections import deque
+
+import websocket
+
+
+def parse_stt_message(raw) -> tuple[str, bool] | None:
+    """Pull (text, is_final) out of a streaming STT message.
+
+    Understands Deepgram's `channel.alternatives[0].transcript` shape and a
+    flat `{"text"|"transcript": ..., "is_final"|"final": ...}` shape.
+    """
+    try:
+        msg = json.loads(raw)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(msg, dict):
+        return None
+    if "channel" in msg:
+        alternatives = msg["channel"].get("alternatives") or [{}]
+        text = alternatives[0].get("transcript", "")
+    else:
+        text = msg.get("transcript") or msg.get("text") or ""
+    is_final = bool(msg.get("is_final", msg.get("final", False)))
+    return (text, is_final) if text.strip() else None
+
+
+class _CallRelay:
+    def __init__(self, call_id: str, room: str, history: int, max_frames: int):
+        self.call_id = call_id
+        self.room = room
+        # Audio waiting for the sender; None wakes it up to stop
+        self.frames: queue.Queue = queue.Queue(maxsize=max_frames)
+        self.dropped = 0
+        self.finals = deque(maxlen=history)
+        self.pending: list[dict] = []
+        self.partial: dict | None = None
+        self.lock = threading.Lock()
+        self.running = True
+        self.stt = None
+
+
+class TranscriptRelay:
+    """Relay each active call's listen-in audio to a streaming STT websocket
+    and push the resulting text to the owning teacher.
+
+    Audio arrives through `feed()` (wired up as an AudioFanout sink, so the
+    call's listenUrl is only opened once). Every call gets one upstream STT
+    connection, written by its own sender from a queue of at most
+    `max_frames`: `feed()` never blocks the fan-out pump, and a slow STT
+    connection loses its oldest unsent frames instead. Transcripts are not emitted
+    one by one: a flusher sends a single `transcript_update` per
+    `flush_interval` carrying all new final segments plus only the newest
+    partial, so a chatty recogniser can't flood a slow teacher socket. If
+    finals pile up faster than they are flushed, the oldest unsent ones are
+    dropped from the update (they remain in the per-call ring buffer that
+    late joiners read through `history()`).
+    """
+
+    def __init__(self, emit, spawn, sleep, *, stt_url: str, stt_headers: list[str] | None = None,
+                 flush_interval: float = 0.25, history: int = 200, max_pending: int = 100,
+                 max_frames: int = 200, connect=websocket.create_connection, logger=None):
+        self.emit = emit
+        self.spawn = spawn
+        self.sleep = sleep
+        self.stt_url = stt_url
+        self.stt_headers = stt_headers or []
+        self.flush_interval = flush_interval
+        self.history_size = history
+        self.max_pending = max_pending
+        self.max_frames = max_frames
+        self.connect = connect
+        self.logger = logger or logging.getLogger(__name__)
+        self._calls: dict[str, _CallRelay] = {}
+        self._lock = threading.Lock()
+
+    def start(self, call_id: str, room: str):
+        with self._lock:
+            if call_id in self._calls:
+                return
+            relay = self._calls[call_id] = _CallRelay(call_id, room, self.history_size, self.max_frames)
+        self.spawn(self._run, relay)
+
+    def feed(self, call_id: str, frame: bytes):
+        """Queue one raw audio frame for the call's STT connection, without blocking."""
+        relay = self._calls.get(call_id)
+        if relay is None or relay.stt is None:
+            return
+        if self._offer(relay, frame):
+            return
+        relay.dropped += 1
+        if relay.dropped == 1:
+            self.logger.warning(f"Transcript relay STT for {call_id} is falling behind; dropping audio")
+
+    @staticmethod
+    def _offer(relay: _CallRelay, item) -> bool:
+        """put_nowait, making room by discarding the oldest frame once. False if a frame was lost."""
+        try:
+            relay.frames.put_nowait(item)
+            return True
+        except queue.Full:
+            pass
+        try:
+            relay.frames.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            relay.frames.put_nowait(item)
+        except queue.Full:
+            pass
+        return False
+
+    def stop(self, call_id: str):
+        with self._lock:
+            relay = self._calls.pop(call_id, None)
+        if relay is None:
+            return
+        relay.running = False
+        self._offer(relay, None)
+        if relay.dropped:
+            self.logger.info(f"Transcript relay for {call_id} dropped {relay.dropped} audio frames")
+        if relay.stt is not None:
+            try:
+                relay.stt.close()
+            except Exception:
+                pass
+
+    def history(self, call_id: str) -> list[dict]:
+        relay = self._calls.get(call_id)
+        if relay is None:
+            return []
+        with relay.lock:
+            segments = list(relay.finals)
+            if relay.partial:
+                segments.append(relay.partial)
+        return segments
+
+    def active(self) -> int:
+        return len(self._calls)
+
+    def _run(self, relay: _CallRelay):
+        try:
+            stt = self.connect(self.stt_url, header=self.stt_headers)
+        except Exception as exc:
+            self.logger.warning(f"Transcript relay for {relay.call_id} could not connect: {exc}")
+            self.stop(relay.call_id)
+            return
+        relay.stt = stt
+        if not relay.running:  # call ended while connecting
+            stt.close()
+            return
+
+        self.spawn(self._flush_loop, relay)
+        self.spawn(self._send_audio, relay, stt)
+        self._receive_transcripts(relay, stt)
+        self.stop(relay.call_id)
+
+    def _send_audio(self, relay: _CallRelay, stt):
+        while relay.running:
+            frame = relay.frames.get()
+            if frame is None:
+                return
+            try:
+                stt.send_binary(frame)
+            except Exception as exc:
+                if relay.running:
+                    self.logger.warning(f"Transcript relay STT send for {relay.call_id} failed: {exc}")
+                    self.stop(relay.call_id)
+                return
+
+    def _receive_transcripts(self, relay: _CallRelay, stt):
+        try:
+            while relay.running:
+                raw = stt.recv()
+                if not raw:
+                    break
+                parsed = parse_stt_message(raw)
+                if parsed is None:
+                    continue
+                text, is_final = parsed
+                segment = {"text": text, "final": is_final, "timestamp": time.time()}
+                with relay.lock:
+                    if is_final:
+                        relay.finals.append(segment)
+                        relay.pending.append(segment)
+                        if len(relay.pending) > self.max_pending:
+                            del relay.pending[:len(relay.pending) - self.max_pending]
+                        relay.partial = None
+                    else:
+                        relay.partial = segment
+        except Exception as exc:
+            if relay.running:
+                self.logger.warning(f"Transcript relay STT for {relay.call_id} ended: {exc}")
+
+    def _flush_loop(self, relay: _CallRelay):
+        sent_partial = None
+        while True:
+            self.sleep(self.flush_interval)
+            stopping = not relay.running
+            with relay.lock:
+                segments, relay.pending = relay.pending, []
+                partial = relay.partial
+            if partial is not None and partial is not sent_partial:
+                segments.append(partial)
+                sent_partial = partial
+            if segments:
+                self.emit("transcript_update", {"callId": relay.call_id, "segments": segments}, relay.room)
+            if stopping:
+                return
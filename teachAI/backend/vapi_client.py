@@ -0,0 +1,238 @@
+import io, random, threading, time, uuid
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised without touching the network while the breaker is open."""
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive upstream failures and lets a
+    single trial request through once `reset_timeout` seconds have passed."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class MultipartFileBody:
+    """File-like multipart/form-data body for a single file field.
+
+    `requests` reads it in blocks and sends a Content-Length, so the file is
+    streamed from disk instead of being encoded into memory first.
+    """
+
+    def __init__(self, field: str, filename: str, fileobj, content_type: str, size: int):
+        self.boundary = uuid.uuid4().hex
+        safe_name = filename.replace('"', "%22").replace("\r", "").replace("\n", "")
+        head = (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field}"; filename="{safe_name}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode()
+        tail = f"\r\n--{self.boundary}--\r\n".encode()
+        self._parts = [io.BytesIO(head), fileobj, io.BytesIO(tail)]
+        self._length = len(head) + size + len(tail)
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self) -> int:
+        return self._length
+
+    def read(self, size: int = -1) -> bytes:
+        chunks = []
+        while self._parts and (size < 0 or size > 0):
+            chunk = self._parts[0].read(size)
+            if not chunk:
+                self._parts.pop(0)
+                continue
+            chunks.append(chunk)
+            if size > 0:
+                size -= len(chunk)
+        return b"".join(chunks)
+
+
+class VapiClient:
+    """Shared, keep-alive HTTP client for the Vapi REST API.
+
+    Every request goes through one pooled `requests.Session`, uses the same
+    Bearer auth header, and is retried with jittered exponential backoff on
+    429 (any method) and 5xx / connection errors (idempotent methods only, so a
+    retried POST /call can never dial a student twice).
+    """
+
+    TIMEOUTS = {
+        "assistant": 15,
+        "call": 15,
+        "call_status": 10,
+        "file": 60,
+        "control": 10,
+    }
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    IDEMPOTENT_METHODS = {"GET", "HEAD", "DELETE", "PUT", "OPTIONS"}
+
+    def __init__(self, base_url: str, api_key: str, *, max_retries: int = 3,
+                 backoff: float = 0.5, max_backoff: float = 8.0, pool_size: int = 20,
+                 breaker: CircuitBreaker | None = None, on_request=None):
+        self.base_url = base_url.rstrip("/")
+        # Called as on_request(endpoint, method, status, seconds) after every attempt
+        self.on_request = on_request
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.auth_headers = {"Authorization": f"Bearer {api_key}"}
+
+    def _observe(self, endpoint: str, method: str, status, started: float):
+        if self.on_request is not None:
+            try:
+                self.on_request(endpoint, method, status, time.perf_counter() - started)
+            except Exception:
+                pass
+
+    def _sleep_before_retry(self, attempt: int, resp: requests.Response | None):
+        retry_after = resp.headers.get("Retry-After") if resp is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = min(float(retry_after), self.max_backoff)
+        else:
+            # "Full jitter": spread retries so a degraded Vapi isn't hit in lockstep
+            delay = random.uniform(0, min(self.backoff * (2 ** attempt), self.max_backoff))
+        time.sleep(delay)
+
+    def request(self, method: str, url: str, *, endpoint: str, retries: int | None = None,
+                auth: bool = True, **kwargs) -> requests.Response:
+        """Send a request, retrying per the class policy. Returns the final
+        response without calling `raise_for_status()`."""
+        method = method.upper()
+        if not url.startswith(("http://", "https://")):
+            url = f"{self.base_url}/{url.lstrip('/')}"
+        retries = self.max_retries if retries is None else retries
+        kwargs.setdefault("timeout", self.TIMEOUTS.get(endpoint, 15))
+        if auth:
+            kwargs["headers"] = {**self.auth_headers, **kwargs.get("headers", {})}
+
+        idempotent = method in self.IDEMPOTENT_METHODS
+        for attempt in range(retries + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"Vapi circuit open; skipping {method} {endpoint}")
+
+            resp = None
+            started = time.perf_counter()
+            try:
+                resp = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self._observe(endpoint, method, "error", started)
+                self.breaker.record_failure()
+                if not idempotent or attempt == retries:
+                    raise
+                self._sleep_before_retry(attempt, None)
+                continue
+            except Exception:
+                # Anything else (bad URL, broken chunked body, ...) still has to release a half-open trial
+                self._observe(endpoint, method, "error", started)
+                self.breaker.record_failure()
+                raise
+
+            self._observe(endpoint, method, resp.status_code, started)
+            if resp.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+
+            retryable = resp.status_code == 429 or (idempotent and resp.status_code in self.RETRY_STATUSES)
+            if not retryable or attempt == retries:
+                return resp
+            self._sleep_before_retry(attempt, resp)
+        return resp
+
+    def _json(self, method: str, path: str, *, endpoint: str, **kwargs) -> dict:
+        r = self.request(method, path, endpoint=endpoint, **kwargs)
+        r.raise_for_status()
+        return r.json()
+
+    def create_assistant(self, cfg: dict) -> dict:
+        return self._json("POST", "/assistant", endpoint="assistant", json=cfg)
+
+    def delete_assistant(self, vapi_id: str):
+        r = self.request("DELETE", f"/assistant/{vapi_id}", endpoint="assistant")
+        r.raise_for_status()
+
+    def create_call(self, payload: dict) -> dict:
+        return self._json("POST", "/call", endpoint="call", json=payload)
+
+    def get_call(self, call_id: str) -> dict:
+        return self._json("GET", f"/call/{call_id}", endpoint="call_status")
+
+    def list_calls(self, *, created_after: str | None = None, limit: int = 1000) -> list[dict]:
+        params = {"limit": limit}
+        if created_after:
+            params["createdAtGt"] = created_after
+        return self._json("GET", "/call", endpoint="call_status", params=params)
+
+    def upload_file(self, filename: str, stream, content_type: str, size: int | None = None) -> dict:
+        # A consumed upload stream can't be replayed, so never retry
+        if size is None:
+            files = {"file": (filename, stream, content_type)}
+            return self._json("POST", "/file", endpoint="file", files=files, retries=0)
+        body = MultipartFileBody("file", filename, stream, content_type, size)
+        return self._json("POST", "/file", endpoint="file", data=body,
+                          headers={"Content-Type": body.content_type}, retries=0)
+
+    def send_control(self, control_url: str, payload: dict) -> requests.Response:
+        """POST to a call's monitor controlUrl (unauthenticated, not retried).
+
+        Sent on the pooled session but outside `request`: a controlUrl belongs
+        to one call and may be dead (or supplied by a caller), so its failures
+        must not count against the breaker that guards the Vapi API."""
+        started = time.perf_counter()
+        try:
+            resp = self.session.post(control_url, json=payload, timeout=self.TIMEOUTS["control"])
+        except Exception:
+            self._observe("control", "POST", "error", started)
+            raise
+        self._observe("control", "POST", resp.status_code, started)
+        return resp
@@ -0,0 +1,138 @@
+import json, logging, sqlite3, threading, time
+
+
+class WebhookJournal:
+    """Durable local queue for call rows produced by Vapi webhooks.
+
+    `append()` writes to SQLite and returns immediately; a background writer
+    drains the journal in batches through `flush(rows)`. Rows are keyed by
+    call id, so a repeated report for the same call replaces the pending one
+    instead of queueing a second write; each replacement bumps the row's
+    `version`, and only the version that was flushed is removed. A failed batch is retried row by row
+    so one bad call can't hold up the rest; each failing row backs off
+    exponentially and is parked as dead after `max_attempts`.
+    """
+
+    def __init__(self, path: str, flush, *, batch_size: int = 100, interval: float = 1.0,
+                 max_attempts: int = 8, max_backoff: float = 300.0, logger=None):
+        self.flush = flush
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self.max_backoff = max_backoff
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._running = False
+
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS pending (
+                call_id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt REAL NOT NULL,
+                dead INTEGER NOT NULL DEFAULT 0,
+                enqueued_at REAL NOT NULL,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(pending)")}
+        if "version" not in columns:
+            self._db.execute("ALTER TABLE pending ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+    def append(self, call_id: str, row: dict):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                """
+                INSERT INTO pending (call_id, payload, next_attempt, enqueued_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(call_id) DO UPDATE SET
+                    payload = excluded.payload, attempts = 0, dead = 0,
+                    next_attempt = excluded.next_attempt, version = pending.version + 1
+                """,
+                (call_id, json.dumps(row), now, now),
+            )
+
+    def discard(self, call_ids: list[str]):
+        """Drop pending rows for calls that no longer exist (dead ones included)."""
+        with self._lock:
+            self._db.executemany("DELETE FROM pending WHERE call_id = ?", [(call_id,) for call_id in call_ids])
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM pending WHERE dead = 0").fetchone()[0]
+
+    def _due(self) -> list[tuple[str, dict, int, int]]:
+        with self._lock:
+            rows = self._db.execute(
+                """
+                SELECT call_id, payload, attempts, version FROM pending
+                WHERE dead = 0 AND next_attempt <= ?
+                ORDER BY enqueued_at LIMIT ?
+                """,
+                (time.time(), self.batch_size),
+            ).fetchall()
+        return [(call_id, json.loads(payload), attempts, version) for call_id, payload, attempts, version in rows]
+
+    def _done(self, flushed: list[tuple[str, int]]):
+        """Remove flushed (call_id, version) rows; a row replaced since it was read stays queued."""
+        with self._lock:
+            self._db.executemany("DELETE FROM pending WHERE call_id = ? AND version = ?", flushed)
+
+    def _failed(self, call_id: str, version: int, attempts: int, error: Exception):
+        attempts += 1
+        dead = attempts >= self.max_attempts
+        delay = min(2 ** attempts, self.max_backoff)
+        with self._lock:
+            self._db.execute(
+                "UPDATE pending SET attempts = ?, next_attempt = ?, dead = ? WHERE call_id = ? AND version = ?",
+                (attempts, time.time() + delay, int(dead), call_id, version),
+            )
+        if dead:
+            self.logger.error(f"Giving up on call {call_id} after {attempts} attempts: {error}")
+        else:
+            self.logger.warning(f"Retrying call {call_id} in {delay}s: {error}")
+
+    def drain_once(self) -> int:
+        """Flush one batch of due rows. Returns how many rows were written."""
+        batch = self._due()
+        if not batch:
+            return 0
+        try:
+            self.flush([row for _, row, _, _ in batch])
+            self._done([(call_id, version) for call_id, _, _, version in batch])
+            return len(batch)
+        except Exception as batch_error:
+            self.logger.warning(f"Batch of {len(batch)} call rows failed, retrying individually: {batch_error}")
+
+        written = 0
+        for call_id, row, attempts, version in batch:
+            try:
+                self.flush([row])
+                self._done([(call_id, version)])
+                written += 1
+            except Exception as row_error:
+                self._failed(call_id, version, attempts, row_error)
+        return written
+
+    def run(self, sleep=time.sleep):
+        while self._running:
+            try:
+                if self.drain_once() < self.batch_size:
+                    sleep(self.interval)
+            except Exception:
+                self.logger.exception("Webhook journal writer error")
+                sleep(self.interval)
+
+    def start(self, spawn, sleep=time.sleep):
+        """Start the writer loop with `spawn(fn, *args)`, e.g. socketio.start_background_task."""
+        if self._running:
+            return
+        self._running = True
+        spawn(self.run, sleep)
+
+    def stop(self):
+        self._running = False
@@ -1,32 +1,53 @@
 // audioProcessor.js
 class AudioProcessor extends AudioWorkletProcessor {
-    constructor() {
+    constructor(options) {
         super();
-        this.audioBuffer = new Float32Array();
-        this.port.onmessage = (msg) => {
-            const receivedAudio = msg.data.audioData;
-            const expandedBuffer = new Float32Array(this.audioBuffer.length + receivedAudio.length);
-            expandedBuffer.set(this.audioBuffer, 0);
-            expandedBuffer.set(receivedAudio, this.audioBuffer.length);
-            this.audioBuffer = expandedBuffer;
-        };
+        this.channels = options?.processorOptions?.channels || 2;
+        // Fixed ring buffer (~4 s); if playback falls behind, the oldest audio is overwritten
+        this.capacity = sampleRate * this.channels * 4;
+        this.ring = new Float32Array(this.capacity);
+        this.readIdx = 0;
+        this.writeIdx = 0;
+        this.size = 0;
+        this.port.onmessage = (msg) => this.write(msg.data.audioData);
+    }
+    write(samples) {
+        for (let i = 0; i < samples.length; i++) {
+            this.ring[this.writeIdx] = samples[i];
+            this.writeIdx = (this.writeIdx + 1) % this.capacity;
+        }
+        this.size += samples.length;
+        if (this.size > this.capacity) {
+            this.size = this.capacity;
+            this.readIdx = this.writeIdx;
+        }
+    }
+    read() {
+        if (this.size === 0) return 0;
+        const sample = this.ring[this.readIdx];
+        this.readIdx = (this.readIdx + 1) % this.capacity;
+        this.size--;
+        return sample;
     }
     process(inputs, outputs) {
         const stereoOut = outputs[0]; // Stereo output channels array
         const leftOut = stereoOut[0]; // Left output channel
         const rightOut = stereoOut[1]; // Right output channel (for stereo playback)
-        if (!leftOut) return true; 
+        if (!leftOut) return true;
         for (let sampleIdx = 0; sampleIdx < leftOut.length; sampleIdx++) {
-        
-            leftOut[sampleIdx] = this.audioBuffer[sampleIdx * 2] || 0;
-           
+            if (this.size < this.channels) {
+                leftOut[sampleIdx] = 0;
+                if (rightOut) rightOut[sampleIdx] = 0;
+                continue;
+            }
+            const left = this.read();
+            const right = this.channels === 2 ? this.read() : left;
+            leftOut[sampleIdx] = left;
             if (rightOut) {
-                rightOut[sampleIdx] = this.audioBuffer[sampleIdx * 2 + 1] || 0;
+                rightOut[sampleIdx] = right;
             }
         }
-        
-        this.audioBuffer = this.audioBuffer.slice(leftOut.length * 2);
-        return true; 
+        return true;
     }
 }
-registerProcessor('audio-processor', AudioProcessor);
\ No newline at end of file
+registerProcessor('audio-processor', AudioProcessor);
@@ -10,8 +10,11 @@ let gainNode = null;
 let analyserNode = null;
 let levelCheckInterval = null;
 let audioNode = null;
+let audioSocket = null;
+let audioHandler = null;
+let audioCallId = null;
 
-export default function EnhancedListenCard({ callId = "demo-call", student = "Demo Student", listenUrl = "", controlUrl = "", startTime = Date.now() / 1000 }) {
+export default function EnhancedListenCard({ callId = "demo-call", student = "Demo Student", listenUrl = "", controlUrl = "", startTime = Date.now() / 1000, teacherSocket = null }) {
   const [isListening, setIsListening] = useState(false);
   const [status, setStatus] = useState("disconnected");
   const [audioLevel, setAudioLevel] = useState(0);
@@ -66,7 +69,7 @@ export default function EnhancedListenCard({ callId = "demo-call", student = "De
   const listen = () => {
     if (isListening || !listenUrl) return;
     setStatus("connecting");
-    startAudio(listenUrl, {
+    startAudio({ socket: teacherSocket, callId, listenUrl }, {
       volume: isMuted ? 0 : volume,
       onLevel: setAudioLevel,
       onStatus: (s) => {
@@ -95,6 +98,7 @@ export default function EnhancedListenCard({ callId = "demo-call", student = "De
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({
+          callId,
           controlUrl,
           message: message.trim(),
           endCallAfterSpoken,
@@ -338,15 +342,30 @@ export default function EnhancedListenCard({ callId = "demo-call", student = "De
   );
 }
 
-async function startAudio(listenUrl, options = {}) {
-  if (ws) return;
+function playPcm(buffer) {
+  const int16Array = new Int16Array(buffer);
+  const float32Array = Float32Array.from(int16Array, i => i / 32768.0);
+  audioNode.port.postMessage({ audioData: float32Array }, [float32Array.buffer]);
+}
+
+async function startAudio({ socket, callId, listenUrl }, options = {}) {
+  if (ws || audioSocket) return;
   const { volume = 1, onLevel, onStatus } = options;
   
   try {
     onStatus?.("connecting");
+
+    // Prefer the backend's shared audio fan-out; fall back to the call's raw listenUrl
+    const useFanout = !!socket?.connected;
+    let format = { sampleRate: rate, channels: 2 };
+    if (useFanout) {
+      format = await new Promise((resolve, reject) => {
+        socket.emit("listen_start", { callId }, (res) => (res?.error ? reject(new Error(res.error)) : resolve(res)));
+      });
+    }
     
     // Create audio context
-    audioContext = new AudioContext({ sampleRate: rate });
+    audioContext = new AudioContext({ sampleRate: format.sampleRate });
     
     if (audioContext.state === 'suspended') {
       await audioContext.resume();
@@ -358,7 +377,8 @@ async function startAudio(listenUrl, options = {}) {
     
     // Create audio worklet node
     audioNode = new AudioWorkletNode(audioContext, 'audio-processor', { 
-      outputChannelCount: [2] 
+      outputChannelCount: [2],
+      processorOptions: { channels: format.channels },
     });
     
     gainNode = audioContext.createGain();
@@ -383,6 +403,17 @@ async function startAudio(listenUrl, options = {}) {
       }, 100);
     }
 
+    if (useFanout) {
+      audioSocket = socket;
+      audioCallId = callId;
+      audioHandler = ({ callId: id, audio }) => {
+        if (id === callId && audioNode) playPcm(audio);
+      };
+      socket.on("listen_audio", audioHandler);
+      onStatus?.("connected");
+      return;
+    }
+
     ws = new WebSocket(listenUrl);
     ws.binaryType = 'arraybuffer';
     
@@ -394,9 +425,7 @@ async function startAudio(listenUrl, options = {}) {
     ws.onmessage = (event) => {
       if (event.data instanceof ArrayBuffer && audioNode) {
         try {
-          const int16Array = new Int16Array(event.data);
-          const float32Array = Float32Array.from(int16Array, i => i / 32768.0);
-          audioNode.port.postMessage({ audioData: float32Array });
+          playPcm(event.data);
         } catch (error) {
           console.error("Error processing audio data:", error);
         }
@@ -435,6 +464,14 @@ async function stopAudio() {
     ws.close();
     ws = null;
   }
+
+  if (audioSocket) {
+    audioSocket.off("listen_audio", audioHandler);
+    audioSocket.emit("listen_stop", { callId: audioCallId });
+    audioSocket = null;
+    audioHandler = null;
+    audioCallId = null;
+  }
   
   try {
     if (audioNode) {
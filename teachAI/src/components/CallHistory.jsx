@@ -22,6 +22,8 @@ import {
   AlertCircle
 } from 'lucide-react';
 
+const CALLS_PAGE_SIZE = 50;
+
 const CallHistoryPage = ({ user, showStatus, BACKEND_URL }) => {
   const [callHistory, setCallHistory] = useState({});
   const [loading, setLoading] = useState(true);
@@ -32,11 +34,81 @@ const CallHistoryPage = ({ user, showStatus, BACKEND_URL }) => {
   const [viewedFilter, setViewedFilter] = useState('all');
   const [updatingViewed, setUpdatingViewed] = useState(new Set());
   const [groupingMode, setGroupingMode] = useState('viewed');
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     fetchCallHistory();
   }, []);
 
+  // Recordings are proxied (and cached) by the backend; a new tab or download
+  // can't send the Authorization header, so ask for a short-lived signed URL first
+  const openRecording = async (callId, download = false) => {
+    // Open the tab now, while the click still counts as a user gesture
+    const playerWindow = download ? null : window.open('', '_blank');
+    try {
+      const { data: sessionData } = await supabase.auth.getSession();
+      const token = sessionData?.session?.access_token;
+      if (!token) {
+        throw new Error('Not authenticated');
+      }
+
+      const response = await fetch(`${BACKEND_URL}/calls/${callId}/recording-link`, {
+        method: 'POST',
+        headers: { 'Authorization': `Bearer ${token}` }
+      });
+      if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+      }
+
+      const { url } = await response.json();
+      const href = `${BACKEND_URL}${url}${download ? '&download=1' : ''}`;
+      if (playerWindow) {
+        playerWindow.location = href;
+      } else {
+        window.location.assign(href);
+      }
+    } catch (error) {
+      playerWindow?.close();
+      console.error('Error opening recording:', error);
+      showStatus('Failed to open recording', 'error');
+    }
+  };
+
+  // One page of calls, newest first; transcripts are fetched on demand when a call is opened
+  const fetchCallsPage = async (token, cursor = null) => {
+    const fields = 'id,student_name,assistant,summary,recording_url,duration_sec,started_at,viewed';
+    const params = new URLSearchParams({ fields, limit: String(CALLS_PAGE_SIZE) });
+    if (cursor) params.set('cursor', cursor);
+
+    const response = await fetch(`${BACKEND_URL}/teacher-calls?${params}`, {
+      method: 'GET',
+      headers: {
+        'Content-Type': 'application/json',
+        'Authorization': `Bearer ${token}`
+      }
+    });
+
+    if (!response.ok) {
+      throw new Error(`HTTP error! status: ${response.status}`);
+    }
+
+    const page = await response.json();
+    const calls = page.calls.map(call => ({
+      id: call.id,
+      userName: call.student_name || 'Anonymous Student',
+      assistantName: call.assistant?.assistant_name || 'Unknown Assistant',
+      summary: call.summary || 'No summary available',
+      transcript: null,
+      duration: formatSecondsToMMSS(call.duration_sec || 0),
+      recordingUrl: call.recording_url,
+      startTime: call.started_at,
+      endTime: call.started_at,
+      viewed: call.viewed || false
+    }));
+    return { calls, nextCursor: page.nextCursor };
+  };
+
   const fetchCallHistory = async () => {
     try {
       setLoading(true);
@@ -50,40 +122,70 @@ const CallHistoryPage = ({ user, showStatus, BACKEND_URL }) => {
         return;
       }
 
-      const response = await fetch(`${BACKEND_URL}/teacher-calls`, {
-        method: 'GET',
-        headers: {
-          'Content-Type': 'application/json',
-          'Authorization': `Bearer ${token}`
-        }
+      const page = await fetchCallsPage(token);
+      setCallHistory(groupCalls(page.calls, groupingMode));
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      console.error('Error fetching call history:', error);
+      showStatus('Failed to load call history', 'error');
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  const loadMoreCalls = async () => {
+    if (!nextCursor || loadingMore) return;
+    try {
+      setLoadingMore(true);
+
+      const { data: sessionData } = await supabase.auth.getSession();
+      const token = sessionData?.session?.access_token;
+      if (!token) {
+        showStatus("Not authenticated. Please log in again.", "error");
+        return;
+      }
+
+      const page = await fetchCallsPage(token, nextCursor);
+      setCallHistory(prevHistory => {
+        const loadedIds = new Set(Object.values(prevHistory).flat().map(call => call.id));
+        const allCalls = [
+          ...Object.values(prevHistory).flat(),
+          ...page.calls.filter(call => !loadedIds.has(call.id)),
+        ];
+        return groupCalls(allCalls, groupingMode);
       });
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      console.error('Error loading more calls:', error);
+      showStatus('Failed to load more calls', 'error');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const openCall = async (call) => {
+    setSelectedCall(call);
+    if (call.transcript !== null) return;
+
+    try {
+      const { data: sessionData } = await supabase.auth.getSession();
+      const token = sessionData?.session?.access_token;
+      if (!token) return;
 
+      const response = await fetch(`${BACKEND_URL}/calls/${call.id}/transcript`, {
+        headers: { 'Authorization': `Bearer ${token}` }
+      });
       if (!response.ok) {
         throw new Error(`HTTP error! status: ${response.status}`);
       }
 
-      const callRows = await response.json();
-
-      const processedCalls = callRows.map(call => ({
-        id: call.id,
-        userName: call.student_name || 'Anonymous Student',
-        assistantName: call.assistant?.assistant_name || 'Unknown Assistant',
-        summary: call.summary || 'No summary available',
-        transcript: call.transcript || 'No transcript available',
-        duration: formatSecondsToMMSS(call.duration_sec || 0),
-        recordingUrl: call.recording_url,
-        startTime: call.started_at,
-        endTime: call.started_at,
-        viewed: call.viewed || false
-      }));
-
-      const groupedCalls = groupCalls(processedCalls, groupingMode);
-      setCallHistory(groupedCalls);
+      const { transcript } = await response.json();
+      const loaded = transcript || 'No transcript available';
+      call.transcript = loaded;
+      setSelectedCall(prev => (prev?.id === call.id ? { ...prev, transcript: loaded } : prev));
     } catch (error) {
-      console.error('Error fetching call history:', error);
-      showStatus('Failed to load call history', 'error');
-    } finally {
-      setLoading(false);
+      console.error('Error fetching transcript:', error);
+      showStatus('Failed to load transcript', 'error');
     }
   };
 
@@ -197,32 +299,31 @@ const CallHistoryPage = ({ user, showStatus, BACKEND_URL }) => {
         return;
       }
 
-      // Update all calls in parallel
-      const updatePromises = callsToUpdate.map(call => 
-        fetch(`${BACKEND_URL}/mark-call-viewed/${call.id}`, {
-          method: 'PATCH',
-          headers: {
-            'Content-Type': 'application/json',
-            'Authorization': `Bearer ${token}`
-          },
-          body: JSON.stringify({ viewed })
+      // One request for the whole group; the backend reports a status per call
+      const response = await fetch(`${BACKEND_URL}/calls/bulk`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          'Authorization': `Bearer ${token}`
+        },
+        body: JSON.stringify({
+          ids: callsToUpdate.map(call => call.id),
+          operation: viewed ? 'mark_viewed' : 'mark_unviewed'
         })
-      );
+      });
 
-      const responses = await Promise.all(updatePromises);
-      
-      // Check if all requests succeeded
-      const allSuccessful = responses.every(response => response.ok);
-      
-      if (!allSuccessful) {
-        throw new Error('Some calls failed to update');
+      if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
       }
 
+      const { results } = await response.json();
+      const updatedIds = new Set(results.filter(result => result.status === 'ok').map(result => result.id));
+
       // Update local state
       setCallHistory(prevHistory => {
         const allCalls = Object.values(prevHistory).flat();
         const updatedCalls = allCalls.map(call => 
-          callsToUpdate.some(updateCall => updateCall.id === call.id) 
+          updatedIds.has(call.id) 
             ? { ...call, viewed } 
             : call
         );
@@ -230,8 +331,12 @@ const CallHistoryPage = ({ user, showStatus, BACKEND_URL }) => {
         return groupCalls(updatedCalls, groupingMode);
       });
 
+      if (updatedIds.size < callsToUpdate.length) {
+        throw new Error('Some calls failed to update');
+      }
+
       showStatus(
-        `${callsToUpdate.length} calls marked as ${viewed ? 'viewed' : 'unviewed'}`, 
+        `${updatedIds.size} calls marked as ${viewed ? 'viewed' : 'unviewed'}`, 
         'success'
       );
     } catch (error) {
@@ -601,7 +706,7 @@ const CallHistoryPage = ({ user, showStatus, BACKEND_URL }) => {
                           <div className="flex flex-wrap gap-3">
                             <button
                               onClick={() => {
-                                setSelectedCall(call);
+                                openCall(call);
                                 if (!call.viewed) {
                                   markCallViewed(call.id, true);
                                 }
@@ -614,7 +719,7 @@ const CallHistoryPage = ({ user, showStatus, BACKEND_URL }) => {
                             {call.recordingUrl && (
                               <button
                                 onClick={() => {
-                                  window.open(call.recordingUrl, '_blank');
+                                  openRecording(call.id);
                                   if (!call.viewed) {
                                     markCallViewed(call.id, true);
                                   }
@@ -626,10 +731,9 @@ const CallHistoryPage = ({ user, showStatus, BACKEND_URL }) => {
                               </button>
                             )}
                             {call.recordingUrl && (
-                              <a
-                                href={call.recordingUrl}
-                                download
+                              <button
                                 onClick={() => {
+                                  openRecording(call.id, true);
                                   if (!call.viewed) {
                                     markCallViewed(call.id, true);
                                   }
@@ -638,7 +742,7 @@ const CallHistoryPage = ({ user, showStatus, BACKEND_URL }) => {
                               >
                                 <Download className="w-4 h-4" />
                                 Download
-                              </a>
+                              </button>
                             )}
                           </div>
                         </div>
@@ -650,6 +754,18 @@ const CallHistoryPage = ({ user, showStatus, BACKEND_URL }) => {
             ))}
           </div>
         )}
+
+        {nextCursor && (
+          <div className="flex justify-center mt-6">
+            <button
+              onClick={loadMoreCalls}
+              disabled={loadingMore}
+              className="px-6 py-3 bg-zinc-800 hover:bg-zinc-700 disabled:opacity-50 text-zinc-200 rounded-xl transition-colors"
+            >
+              {loadingMore ? 'Loading…' : 'Load more calls'}
+            </button>
+          </div>
+        )}
       </div>
 
       {/* Transcript Modal */}
@@ -713,7 +829,11 @@ const CallHistoryPage = ({ user, showStatus, BACKEND_URL }) => {
                 <div>
                   <h4 className="font-semibold text-zinc-200 mb-3">Full Transcript</h4>
                   <div className="space-y-3">
-                    {selectedCall.transcript && selectedCall.transcript !== 'No transcript available' ? (
+                    {selectedCall.transcript === null ? (
+                      <div className="text-center py-8 text-zinc-500">
+                        <p>Loading transcript...</p>
+                      </div>
+                    ) : selectedCall.transcript && selectedCall.transcript !== 'No transcript available' ? (
                       selectedCall.transcript.split('\n').filter(line => line.trim()).map((line, index) => (
                         <div key={index} className="flex gap-3">
                           <div className={`px-3 py-2 rounded-lg max-w-[80%] ${
@@ -746,20 +866,19 @@ const CallHistoryPage = ({ user, showStatus, BACKEND_URL }) => {
                     {selectedCall.recordingUrl && (
                       <>
                         <button
-                          onClick={() => window.open(selectedCall.recordingUrl, '_blank')}
+                          onClick={() => openRecording(selectedCall.id)}
                           className="flex items-center gap-2 px-4 py-2 bg-emerald-100 text-emerald-700 rounded-lg hover:bg-emerald-200 transition-colors"
                         >
                           <Play className="w-4 h-4" />
                           Play Recording
                         </button>
-                        <a
-                          href={selectedCall.recordingUrl}
-                          download
+                        <button
+                          onClick={() => openRecording(selectedCall.id, true)}
                           className="flex items-center gap-2 px-4 py-2 bg-zinc-600 text-zinc-200 rounded-lg hover:bg-zinc-500 transition-colors"
                         >
                           <Download className="w-4 h-4" />
                           Download
-                        </a>
+                        </button>
                       </>
                     )}
                   </div>
@@ -1,10 +1,15 @@
 import { useEffect, useRef } from "react";
 import { io } from "socket.io-client";
+import { supabase } from "../utils/supabaseClient";
 
 export default function useTeacherSocket(isEnabled) {
   const sockRef = useRef(null);
   const reconnectTimeoutRef = useRef(null);
   const isConnectedRef = useRef(false);
+  // callId -> { student, version } for calls currently shown, so the server only
+  // re-sends calls whose version changed. Live events don't carry a version, so a
+  // call touched by one is sent again on the next reconnect.
+  const knownCallsRef = useRef(new Map());
 
   useEffect(() => {
     if (!isEnabled || isConnectedRef.current) {
@@ -19,6 +24,16 @@ export default function useTeacherSocket(isEnabled) {
 
     // Create new socket connection
     const sock = io(`${backendUrl}/teacher`, {
+      // Re-read the session on every (re)connect so the server always gets a fresh token
+      auth: (cb) => {
+        supabase.auth.getSession().then(({ data }) => cb({
+          token: data?.session?.access_token,
+          deltas: true,
+          knownCalls: Object.fromEntries(
+            [...knownCallsRef.current].map(([callId, known]) => [callId, known.version])
+          ),
+        }));
+      },
       transports: ["websocket", "polling"],
       reconnectionAttempts: 10,
       reconnectionDelay: 1000,
@@ -59,23 +74,28 @@ export default function useTeacherSocket(isEnabled) {
   const addEventListeners = (handlers) => {
     if (!sockRef.current) return;
 
-    const { onNewCall, onCallEnded, onCallReport, setActiveCalls, showStatus } = handlers;
+    const { onNewCall, onCallEnded, onCallReport, onCallMonitorReady, setActiveCalls, showStatus } = handlers;
 
     sockRef.current.off("new_call");
     sockRef.current.off("call_ended");
     sockRef.current.off("call_report");
+    sockRef.current.off("call_monitor_ready");
     sockRef.current.off("active_calls");
 
     // Add new listeners
     sockRef.current.on("new_call", data => {
       console.log("📞 New call received:", data);
+      knownCallsRef.current.set(data.callId, { student: data.student, version: null });
       onNewCall?.(data);
       showStatus?.(`📞 New call from ${data.student}`, "success");
     });
     
     sockRef.current.on("call_ended", data => {
       console.log("📞 Call ended:", data);
-      onCallEnded?.(data);
+      // Delta events only carry callId/endTime/duration
+      const student = data.student ?? knownCallsRef.current.get(data.callId)?.student;
+      knownCallsRef.current.delete(data.callId);
+      onCallEnded?.({ ...data, student });
     });
     
     sockRef.current.on("call_report", data => {
@@ -83,9 +103,28 @@ export default function useTeacherSocket(isEnabled) {
       onCallReport?.(data);
     });
     
+    sockRef.current.on("call_monitor_ready", data => {
+      console.log("🎧 Call monitor ready:", data);
+      const known = knownCallsRef.current.get(data.callId);
+      if (known) known.version = null;
+      onCallMonitorReady?.(data);
+    });
+
     sockRef.current.on("active_calls", data => {
       console.log("📋 Active calls update:", data);
-      setActiveCalls?.(data);
+      if (!data?.delta) {
+        knownCallsRef.current = new Map(data.map(c => [c.callId, { student: c.student, version: null }]));
+        setActiveCalls?.(data);
+        return;
+      }
+      data.remove.forEach(callId => knownCallsRef.current.delete(callId));
+      data.upsert.forEach(c => knownCallsRef.current.set(c.callId, { student: c.student, version: null }));
+      Object.entries(data.versions ?? {}).forEach(([callId, version]) => {
+        const known = knownCallsRef.current.get(callId);
+        if (known) known.version = version;
+      });
+      const changed = new Set([...data.remove, ...data.upsert.map(c => c.callId)]);
+      setActiveCalls?.(prev => [...prev.filter(c => !changed.has(c.callId)), ...data.upsert]);
     });
 
     sockRef.current.off("connect");
@@ -289,6 +289,10 @@ export default function TeacherDashboardPage() {
     setCallReports(prev => ({ ...prev, [report.callId]: report }));
   }, []);
 
+  const onCallMonitorReady = useCallback(({ callId, listenUrl, controlUrl }) => {
+    setActiveCalls(prev => prev.map(c => c.callId === callId ? { ...c, listenUrl, controlUrl } : c));
+  }, []);
+
   const onSetActiveCalls = useCallback((calls) => {
     console.log("Setting active calls:", calls);
     setActiveCalls(calls);
@@ -303,11 +307,12 @@ export default function TeacherDashboardPage() {
         onNewCall,
         onCallEnded,
         onCallReport,
+        onCallMonitorReady,
         setActiveCalls: onSetActiveCalls,
         showStatus,
       });
     }
-  }, [socket, user, teacher, onNewCall, onCallEnded, onCallReport, onSetActiveCalls, showStatus, addEventListeners]);
+  }, [socket, user, teacher, onNewCall, onCallEnded, onCallReport, onCallMonitorReady, onSetActiveCalls, showStatus, addEventListeners]);
 
   const handleSignOut = async () => {
     try {
@@ -461,7 +466,7 @@ export default function TeacherDashboardPage() {
                 ) : (
                   <div className="grid gap-4">
                     {activeCalls.map(call => (
-                      <EnhancedListenCard key={call.callId} {...call} />
+                      <EnhancedListenCard key={call.callId} {...call} teacherSocket={socket} />
                     ))}
                   </div>
                 )}